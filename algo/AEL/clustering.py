@@ -18,6 +18,7 @@
 import regex as re
 import os
 import hashlib
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from collections import defaultdict
@@ -135,21 +136,24 @@ class LogParser:
         """
         Abstract templates bin by bin
 
+        Identical contents of a bin share one Event, looked up by content in a dict.
+        Progress is reported per bin, advanced by the number of logs in the bin.
+
         """
-        for key in tqdm(self.bins):
-            abin = self.bins[key]
-            abin["Events"] = []
-
-            for logidx in abin["Logs"]:
-                log = self.df_log["Content_"].loc[logidx]
-                matched = False
-                for event in abin["Events"]:
-                    if log == event.Eventstr:
-                        matched = True
+        contents = self.df_log["Content_"].tolist()
+        with tqdm(total=len(contents)) as progress:
+            for key in self.bins:
+                abin = self.bins[key]
+                events = {}
+                for logidx in abin["Logs"]:
+                    log = contents[logidx]
+                    event = events.get(log)
+                    if event is None:
+                        events[log] = Event(logidx, log)
+                    else:
                         event.logs.append(logidx)
-                        break
-                if not matched:
-                    abin["Events"].append(Event(logidx, log))
+                abin["Events"] = list(events.values())
+                progress.update(len(abin["Logs"]))
 
 
     def reconcile(self):
@@ -160,20 +164,7 @@ class LogParser:
         for key in self.bins:
             abin = self.bins[key]
             if len(abin["Events"]) > self.minEventCount:
-                tobeMerged = []
-                for e1 in abin["Events"]:
-                    if e1.merged:
-                        continue
-                    e1.merged = True
-                    tobeMerged.append([e1])
-
-                    for e2 in abin["Events"]:
-                        if e2.merged:
-                            continue
-                        if self.has_diff(e1.EventToken, e2.EventToken):
-                            tobeMerged[-1].append(e2)
-                            e2.merged = True
-                for Es in tobeMerged:
+                for Es in self.group_events(abin["Events"]):
                     merged_event = reduce(self.merge_event, Es)
                     merged_event.refresh_id()
                     self.merged_events.append(merged_event)
@@ -182,6 +173,60 @@ class LogParser:
                     self.merged_events.append(e)
 
 
+    def group_events(self, events):
+        """
+        Group the events of a bin to be merged, without comparing every pair of events
+
+        Every event not merged yet starts a group with the remaining events for which has_diff holds.
+        Such events differ in at most max_diff positions, so they match the first event exactly on at
+        least one of max_diff + 1 disjoint blocks of positions; candidates are looked up in a per-block
+        index of token ids and only they are compared.
+
+        """
+        for e in events:
+            e.merged = True
+        length = len(events[0].EventToken)
+        max_diff = self.max_diff(length)
+        if length == 0 or max_diff == 0:
+            return [[e] for e in events]
+
+        vocabulary = {}
+        tokens = np.array(
+            [[vocabulary.setdefault(token, len(vocabulary)) for token in e.EventToken] for e in events],
+            dtype=np.int64,
+        )
+        merged = np.zeros(len(events), dtype=bool)
+        if max_diff < length:
+            blocks = np.array_split(np.arange(length), max_diff + 1)
+            indexes = []
+            for block in blocks:
+                index = defaultdict(list)
+                for idx, row in enumerate(tokens[:, block]):
+                    index[row.tobytes()].append(idx)
+                indexes.append(index)
+
+        groups = []
+        for idx in range(len(events)):
+            if merged[idx]:
+                continue
+            merged[idx] = True
+            if max_diff >= length:
+                candidates = np.flatnonzero(~merged)
+            else:
+                candidates = set()
+                for block, index in zip(blocks, indexes):
+                    key = tokens[idx, block].tobytes()
+                    # Merged events never become candidates again, so buckets are pruned once visited
+                    bucket = index[key] = [other for other in index[key] if not merged[other]]
+                    candidates.update(bucket)
+                candidates = np.array(sorted(candidates), dtype=np.int64)
+            diffs = (tokens[candidates] != tokens[idx]).sum(axis=1)
+            members = candidates[(diffs > 0) & (diffs <= max_diff)]
+            merged[members] = True
+            groups.append([events[idx]] + [events[other] for other in members])
+        return groups
+
+
     def dump(self):
         if not os.path.isdir(self.savePath):
             os.makedirs(self.savePath)
@@ -243,6 +288,17 @@ class LogParser:
         return True if 0 < diff * 1.0 / len(tokens1) <= self.merge_percent else False
 
 
+    def max_diff(self, length):
+        """
+        Largest number of differing tokens for which has_diff holds on events of the given length
+
+        """
+        diff = 0
+        while diff < length and (diff + 1) * 1.0 / length <= self.merge_percent:
+            diff += 1
+        return diff
+
+
     def load_data(self):
         def preprocess(log):
             for currentRex in self.rex:
@@ -11,11 +11,7 @@ class LogClassifier:
 
         for cluster_id, cluster_data in clusters.items():
             log_group = cluster_data["logs"]
-            cluster_category_counter = Counter()
-
-            for log in log_group:
-                category = LogCluster.determine_category(log)[1]
-                cluster_category_counter[category] += 1
+            cluster_category_counter = Counter(LogCluster.categorize(log_group))
 
             if cluster_category_counter:
                 most_common_category, most_common_count = cluster_category_counter.most_common(1)[0]
@@ -38,11 +34,7 @@ class LogClassifier:
 
     @staticmethod
     def determine_best_category(log_group):
-        category_counter = Counter()
-
-        for log in log_group:
-            category = LogCluster.determine_category(log)[1]
-            category_counter[category] += 1
+        category_counter = Counter(LogCluster.categorize(log_group))
 
         most_common_category, frequency = category_counter.most_common(1)[0]
         probability = frequency / len(log_group)
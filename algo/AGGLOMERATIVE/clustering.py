@@ -1,73 +1,137 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import AgglomerativeClustering
+from sklearn.cluster import AgglomerativeClustering, MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
 from sklearn.metrics.pairwise import cosine_similarity
 from collections import Counter
-import joblib
+import numpy as np
+from utils.parser_log import as_log_list
+from utils.mapped_log import group_labels
+from utils.union_find import UnionFind
+from utils.feature_store import FeatureStore
+from utils.model_bundle import load_bundle, require_vectorizer, save_bundle
+from utils.keyword_matcher import KeywordMatcher
+
+
+CATEGORY_KEYWORDS = {
+    "ERROR": ["fail", "exception", "critical", "unavailable", "unable", "invalid", "error", "crash"],
+    "INFO": ["started", "completed", "running", "connected", "scanning", "initializing", "api", "registering",
+             "setting", "info", "ACPI", "using", "cache", "checking", "connection", "startup", "succeeded"],
+    "DEBUG": ["debugging", "variable", "trace", "step", "debug", "using", "checking", "opened", "closed"],
+    "WARNING": ["high", "low", "degraded", "exceeded", "threshold", "warning"]
+}
+# Keywords are matched against lowercased lines, as before (so "ACPI" keeps never matching)
+CATEGORY_MATCHER = KeywordMatcher(CATEGORY_KEYWORDS, default="Unknown")
+
 
 class LogCluster:
-    def __init__(self, n_clusters=5, merge_threshold=0.8, model_file="cluster_model_agglomerative.pkl"):
+    def __init__(self, n_clusters=5, merge_threshold=0.8, model_file="cluster_model_agglomerative.pkl", feature_store=None,
+                 max_dense_samples=5000, n_summaries=1000, svd_components=100, random_state=0):
         self.n_clusters = n_clusters
         self.merge_threshold = merge_threshold
         self.model_file = model_file
-        self.vectorizer = TfidfVectorizer()
+        self.feature_store = feature_store or FeatureStore()
+        self.max_dense_samples = max_dense_samples
+        self.n_summaries = n_summaries
+        self.svd_components = svd_components
+        self.random_state = random_state
+        self.vectorizer = None
         self.cluster_model = None
+        self.labels_ = None
 
 
     def fit(self, logs):
-        X = self.vectorizer.fit_transform(logs)
-        self.cluster_model = AgglomerativeClustering(linkage='ward', n_clusters=self.n_clusters)
-        self.cluster_model.fit(X.toarray())
+        logs = as_log_list(logs)
+        features = self.feature_store.features(logs)
+        self.vectorizer = features.vectorizer
+        X = features.matrix
+        self.cluster_model = AgglomerativeClustering(linkage='ward', n_clusters=min(self.n_clusters, X.shape[0]))
+        if X.shape[0] <= self.max_dense_samples:
+            self.cluster_model.fit(X.toarray())
+            self.labels_ = self.cluster_model.labels_
+        else:
+            self.labels_ = self._fit_summaries(X)
         clusters = self._create_clusters(logs)
-        clusters = self._merge_similar_clusters(clusters)
-        best_clusters = self._extract_best_clusters(clusters)
-        joblib.dump(self.cluster_model, self.model_file)
+        clusters = self._merge_similar_clusters(clusters, X)
+        best_clusters = self._extract_best_clusters(clusters, logs)
+        save_bundle(self.model_file, self.cluster_model, vectorizer=self.vectorizer, model=type(self).__name__,
+                    n_clusters=self.n_clusters, merge_threshold=self.merge_threshold, n_samples=len(logs))
         return best_clusters
 
 
-    def load_model(self):
-        self.cluster_model = joblib.load(self.model_file)
+    def load_model(self, mmap_mode='r'):
+        bundle = load_bundle(self.model_file, mmap_mode)
+        require_vectorizer(bundle, self.model_file)
+        self.cluster_model = bundle["estimator"]
+        self.vectorizer = bundle["vectorizer"]
+
+
+    def _fit_summaries(self, X):
+        """
+        Ward linkage for large inputs: runs on micro-cluster summaries instead of the dense n x n problem.
+
+        The sparse TF-IDF matrix is projected with TruncatedSVD, summarized into n_summaries micro-clusters
+        with MiniBatchKMeans, ward linkage clusters the micro-cluster centers and every line gets the label
+        of its micro-cluster. Memory is O(n * svd_components + n_summaries^2).
+
+        Args:
+        - X (sparse matrix): TF-IDF vectors.
+
+        Returns:
+        - ndarray: Cluster label of every line.
+        """
+        n_components = min(self.svd_components, X.shape[1] - 1)
+        reduced = TruncatedSVD(n_components=n_components, random_state=self.random_state).fit_transform(X) \
+            if n_components >= 1 else X.toarray()
+        summaries = MiniBatchKMeans(n_clusters=min(max(self.n_summaries, self.cluster_model.n_clusters), X.shape[0]),
+                                    random_state=self.random_state).fit(reduced)
+        self.cluster_model.fit(summaries.cluster_centers_)
+        return self.cluster_model.labels_[summaries.labels_]
 
 
     def _create_clusters(self, logs):
-        clusters = {}
-        for i, label in enumerate(self.cluster_model.labels_):
-            if label not in clusters:
-                clusters[label] = {"logs": [], "categories": []}
-            log_with_category, category = self.determine_category(logs[i])
-            clusters[label]["logs"].append(log_with_category)
-            clusters[label]["categories"].append(category)
-        return clusters
+        """Groups line indices by cluster label, in order of first appearance."""
+        return {label: {"indices": indices} for label, indices in group_labels(self.labels_).items()}
+
 
+    def _merge_similar_clusters(self, clusters, X):
+        """
+        Merges clusters whose centroids have a cosine similarity of at least merge_threshold.
 
-    def _merge_similar_clusters(self, clusters):
+        Centroids are the mean TF-IDF rows of the clusters, taken from the already computed matrix.
+        Clusters connected by similarity edges are joined with union-find (merging is transitive);
+        a merged cluster keeps the label of its first cluster and the concatenated index arrays.
+
+        Args:
+        - clusters (dict): Keys are cluster labels, values are dictionaries with line "indices".
+        - X (sparse matrix): TF-IDF vectors of the lines.
+
+        Returns:
+        - dict: Merged clusters.
+        """
         cluster_keys = list(clusters.keys())
+        centroids = np.vstack([np.asarray(X[clusters[key]["indices"]].mean(axis=0)) for key in cluster_keys])
+        similarities = cosine_similarity(centroids)
+        union_find = UnionFind(len(cluster_keys))
+        for i, j in zip(*np.nonzero(np.triu(similarities >= self.merge_threshold, k=1))):
+            union_find.union(i, j)
+
         merged_clusters = {}
-        cluster_texts = [' '.join(clusters[key]["logs"]) for key in cluster_keys]
-        X_clusters = self.vectorizer.fit_transform(cluster_texts)
-        similarities = cosine_similarity(X_clusters)
-        merged = set()
-
-        for i, key1 in enumerate(cluster_keys):
-            if key1 in merged:
-                continue
-            merged_clusters[key1] = clusters[key1]
-            for j, key2 in enumerate(cluster_keys):
-                if i != j and key2 not in merged:
-                    if similarities[i][j] >= self.merge_threshold:
-                        merged_clusters[key1]["logs"].extend(clusters[key2]["logs"])
-                        merged_clusters[key1]["categories"].extend(clusters[key2]["categories"])
-                        merged.add(key2)
+        for group in union_find.groups():
+            indices = np.concatenate([clusters[cluster_keys[i]]["indices"] for i in group])
+            merged_clusters[cluster_keys[group[0]]] = {"indices": indices}
         return merged_clusters
 
 
-    def _extract_best_clusters(self, clusters):
+    def _extract_best_clusters(self, clusters, logs):
         best_clusters = {}
         for label, cluster_data in clusters.items():
-            category_counter = Counter(cluster_data["categories"])
+            cluster_logs = [logs[i] for i in cluster_data["indices"]]
+            categories = self.categorize(cluster_logs)
+            category_counter = Counter(categories)
             most_common_category = next(
                 (category for category, count in category_counter.most_common() if category != 'Unknown'), 'Unknown')
             best_clusters[label] = {
-                "logs": cluster_data["logs"],
+                "logs": [f"{log} [{category}]" for log, category in zip(cluster_logs, categories)],
+                "indices": cluster_data["indices"],
                 "most_common_category": most_common_category,
                 "all_categories": category_counter
             }
@@ -76,19 +140,14 @@ class LogCluster:
 
     @staticmethod
     def determine_category(log):
-        keywords = {
-            "ERROR": ["fail", "exception", "critical", "unavailable", "unable", "invalid", "error", "crash"],
-            "INFO": ["started", "completed", "running", "connected", "scanning", "initializing", "api", "registering",
-                     "setting", "info", "ACPI", "using", "cache", "checking", "connection", "startup", "succeeded"],
-            "DEBUG": ["debugging", "variable", "trace", "step", "debug", "using", "checking", "opened", "closed"],
-            "WARNING": ["high", "low", "degraded", "exceeded", "threshold", "warning"]
-        }
-
-        for category, category_keywords in keywords.items():
-            for keyword in category_keywords:
-                if keyword in log.lower():
-                    return f"{log} [{category}]", category
-        return f"{log} [Unknown]", "Unknown"
+        category = CATEGORY_MATCHER.match(log.lower())
+        return f"{log} [{category}]", category
+
+
+    @staticmethod
+    def categorize(logs):
+        """Returns the category of every log line in one batch."""
+        return CATEGORY_MATCHER.categorize([log.lower() for log in logs])
 
 
     def pretty_print_clusters(self, clusters):
@@ -1,19 +1,28 @@
 import re
-import math
-from collections import Counter
+import string
+import numpy as np
+import pandas as pd
+
+
+TIMESTAMP_REGEXES = [
+    r'\b\d{1,2}:\d{2}:\d{2}\b',
+    r'\b\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\b',
+    r'\b\d{2}:\d{2}:\d{2}\.\d{3}\b',
+    r'\b\d{2}:\d{2}:\d{2},\d{2}.\d{2}.\d{4}\b',
+    r'\b\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}Z\b',
+    r'\b\d{2}.\d{2}.\d{4} \d{2}:\d{2}:\d{2}\b',
+    r'\b\d{2}:\d{2}\b',
+    r'\b\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2}\b'
+]
+# One alternation instead of trying every pattern in turn: a line has a timestamp if any of them matches
+TIMESTAMP_PATTERN = re.compile('|'.join(f'(?:{regex})' for regex in TIMESTAMP_REGEXES))
+WHITESPACE = frozenset(string.whitespace)
+
 
 class LogClassifier:
     def __init__(self):
-        self.timestamp_regexes = [
-            r'\b\d{1,2}:\d{2}:\d{2}\b',
-            r'\b\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\b',
-            r'\b\d{2}:\d{2}:\d{2}\.\d{3}\b',
-            r'\b\d{2}:\d{2}:\d{2},\d{2}.\d{2}.\d{4}\b',
-            r'\b\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}Z\b',
-            r'\b\d{2}.\d{2}.\d{4} \d{2}:\d{2}:\d{2}\b',
-            r'\b\d{2}:\d{2}\b',
-            r'\b\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2}\b'
-        ]
+        self.timestamp_regexes = TIMESTAMP_REGEXES
+        self.timestamp_pattern = TIMESTAMP_PATTERN
 
 
     def classify(self, logs, clusters):
@@ -30,26 +39,8 @@ class LogClassifier:
         cluster_categories = {}
 
         for cluster_id, log_group in clusters.items():
-            cluster_category_counter = Counter()
-            total_weight = 0
-
-            for log in log_group:
-                timestamps = self._find_timestamps(log)
-                if timestamps:
-                    weight = self._calculate_weight(log)
-                    total_weight += weight
-                    cluster_category_counter[log] += weight
-                else:
-                    total_weight *= math.log(cluster_category_counter[log] + 2)
-                    cluster_category_counter[log] += 1
-
-            for log, count in cluster_category_counter.items():
-                cluster_category_counter[log] = count / total_weight
-
-            most_common_log = cluster_category_counter.most_common(1)[0][0]
-
             cluster_categories[cluster_id] = {
-                "most_common_log": most_common_log,
+                "most_common_log": self._most_common_log(log_group),
                 "num_logs": len(log_group),
                 "total_logs": len(logs),
                 "percentage_of_total_logs": len(log_group) / len(logs) * 100
@@ -58,19 +49,38 @@ class LogClassifier:
         return cluster_categories
 
 
+    def _most_common_log(self, log_group):
+        """
+        Finds the log line with the highest total weight in a cluster.
+
+        Every occurrence of a line counts its weight (number of distinct non-whitespace characters)
+        if the line contains a timestamp and 1 otherwise. Timestamps and weights are computed once per
+        distinct line in a single vectorized pass; ties go to the line that appears first.
+
+        Args:
+        - log_group (list): Log lines of the cluster.
+
+        Returns:
+        - str: Most common log line.
+        """
+        codes, unique_logs = pd.factorize(pd.Series(list(log_group), dtype=object))
+        unique_logs = pd.Series(unique_logs, dtype=object)
+        has_timestamp = unique_logs.str.contains(self.timestamp_pattern, regex=True).to_numpy(dtype=bool)
+        weights = np.where(has_timestamp, unique_logs.map(self._calculate_weight).to_numpy(dtype=np.float64), 1.0)
+        scores = np.bincount(codes, weights=weights[codes], minlength=len(unique_logs))
+        return unique_logs.iat[int(scores.argmax())]
+
+
     def _find_timestamps(self, log):
-        """Finds timestamps in a log line using predefined regex patterns."""
-        for regex in self.timestamp_regexes:
-            timestamps = re.findall(regex, log)
-            if timestamps:
-                return timestamps
-        return None
+        """Finds timestamps in a log line using the combined timestamp pattern."""
+        timestamps = [match.group() for match in self.timestamp_pattern.finditer(log)]
+        return timestamps or None
 
 
-    def _calculate_weight(self, log):
+    @staticmethod
+    def _calculate_weight(log):
         """Calculates the weight of a log line based on its unique characters."""
-        import string
-        return len(set(log)) - len(set(log).intersection(set(string.whitespace)))
+        return len(set(log).difference(WHITESPACE))
 
 
     def pretty_print_classification(self, classification):
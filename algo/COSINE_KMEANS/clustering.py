@@ -1,61 +1,83 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.cluster import KMeans
 import numpy as np
-import joblib
+from utils.parser_log import as_log_list
+from utils.mapped_log import group_labels, take_lines
+from utils.dedup import MASK_RULES, deduplicate_logs
+from utils.feature_store import FeatureStore
+from utils.model_bundle import load_bundle, require_vectorizer, save_bundle
+from utils.spherical_kmeans import SphericalKMeans
+from utils.cluster_selection import elbow_sweep, second_difference_knee
 
 
 class LogCluster:
-    def __init__(self, max_clusters=10, model_file="cluster_model_cosine_kmeans.pkl"):
+    def __init__(self, max_clusters=10, model_file="cluster_model_cosine_kmeans.pkl", dedup=True, mask_rules=MASK_RULES,
+                 feature_store=None, workers=1):
         self.max_clusters = max_clusters
         self.model_file = model_file
-        self.vectorizer = TfidfVectorizer()
+        self.dedup = dedup
+        self.mask_rules = mask_rules
+        self.feature_store = feature_store or FeatureStore()
+        self.workers = workers
+        self.vectorizer = None
         self.cluster_model = None
+        self.labels_ = None
 
 
     def fit(self, logs):
         """
-        Clusters the logs using K-means and cosine similarity.
+        Clusters the logs using spherical K-means (cosine similarity on L2-normalized sparse TF-IDF rows).
 
         Args:
-        - logs (list): List of log lines.
+        - logs (iterable): List of log lines, iterator of lines or iterator of line batches (LogReader).
 
         Returns:
         - dict: Dictionary, where keys are cluster numbers, values are a list of logs in each cluster.
         """
-        X = self.vectorizer.fit_transform(logs)
-        cosine_distances_matrix = cosine_similarity(X)
-        optimal_num_clusters = self.determine_optimal_clusters(cosine_distances_matrix)
-        self.cluster_model = KMeans(n_clusters=optimal_num_clusters, init='k-means++', max_iter=300, n_init=10,
-                                    random_state=0)
-        self.cluster_model.fit(X)
-        joblib.dump(self.cluster_model, self.model_file)
+        logs = as_log_list(logs)
+        # Identical lines (after masking variable tokens) are clustered once, weighted by their count
+        if self.dedup:
+            documents, weights, inverse = deduplicate_logs(logs, self.mask_rules)
+        else:
+            documents, weights, inverse = logs, None, np.arange(len(logs))
+        # Fitted features are reused from the feature store when the same documents were vectorized before
+        features = self.feature_store.features(documents)
+        self.vectorizer = features.vectorizer
+        X = features.matrix
+        optimal_num_clusters = self.determine_optimal_clusters(X, weights)
+        self.cluster_model = SphericalKMeans(n_clusters=optimal_num_clusters, max_iter=300, n_init=10, random_state=0)
+        self.cluster_model.fit(X, sample_weight=weights)
+        self.labels_ = self.cluster_model.labels_[inverse]
+        save_bundle(self.model_file, self.cluster_model, vectorizer=self.vectorizer,
+                    mask_rules=self.mask_rules if self.dedup else None, model=type(self).__name__,
+                    n_samples=len(logs))
         clusters = self._collect_clusters(logs)
         return clusters
 
 
-    def load_model(self):
-        """Loads the clustering model from a file."""
-        self.cluster_model = joblib.load(self.model_file)
+    def load_model(self, mmap_mode='r'):
+        """Loads the clustering model bundle (model, fitted vectorizer and masking rules) from a file."""
+        bundle = load_bundle(self.model_file, mmap_mode)
+        require_vectorizer(bundle, self.model_file)
+        self.cluster_model = bundle["estimator"]
+        self.vectorizer = bundle["vectorizer"]
+        self.mask_rules = bundle["mask_rules"]
 
 
-    def determine_optimal_clusters(self, distances_matrix):
+    def determine_optimal_clusters(self, X, sample_weight=None):
         """
-        Determines the optimal number of clusters using the elbow method.
+        Determines the optimal number of clusters using the elbow method on the cosine inertia.
+
+        The inertia curve comes from elbow_sweep: k values are fitted in parallel (workers) with warm starts,
+        and the sweep stops once larger k can no longer change the second-difference knee.
 
         Args:
-        - distances_matrix (ndarray): Matrix of pairwise distances between vectors.
+        - X (sparse matrix): TF-IDF vectors.
+        - sample_weight (ndarray): Occurrence count of every vector. Default is None.
 
         Returns:
         - int: Optimal number of clusters.
         """
-        wcss = []
-        for i in range(1, self.max_clusters + 1):
-            kmeans = KMeans(n_clusters=i, init='k-means++', max_iter=300, n_init=10, random_state=0)
-            kmeans.fit(distances_matrix)
-            wcss.append(kmeans.inertia_)
-        optimal_num_clusters = np.argmin(np.diff(np.diff(wcss))) + 1
-        return optimal_num_clusters
+        wcss = elbow_sweep(X, self.max_clusters, sample_weight, n_init=10, workers=self.workers, random_state=0)
+        return second_difference_knee(wcss)
 
 
     def _collect_clusters(self, logs):
@@ -63,16 +85,14 @@ class LogCluster:
         Collects logs into clusters based on the fitted model.
 
         Args:
-        - logs (list): List of log lines.
+        - logs (list or MappedLog): Log lines; for a MappedLog the clusters are lazy views over line indices.
 
         Returns:
         - dict: Dictionary, where keys are cluster numbers, values are a list of logs in each cluster.
         """
         clusters = {}
-        for i, label in enumerate(self.cluster_model.labels_):
-            if label not in clusters:
-                clusters[label] = []
-            clusters[label].append(logs[i])
+        for label, indices in group_labels(self.labels_).items():
+            clusters[label] = take_lines(logs, indices)
         return clusters
 
 
@@ -1,17 +1,107 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.cluster import DBSCAN
-from sklearn.metrics.pairwise import euclidean_distances
-import joblib
+from sklearn.neighbors import NearestNeighbors
 import numpy as np
+from scipy import sparse
+from utils.parser_log import as_log_list
+from utils.mapped_log import group_labels, take_lines
+from utils.dedup import MASK_RULES, deduplicate_logs
+from utils.feature_store import FeatureStore
+from utils.model_bundle import load_bundle, require_vectorizer, save_bundle
+
+
+def radius_graph(X, radius):
+    """
+    Builds the sparse graph of euclidean distances between rows that are at most `radius` apart.
+
+    Args:
+    - X (sparse matrix): Feature matrix.
+    - radius (float): Largest distance kept in the graph.
+
+    Returns:
+    - csr_matrix: Distance graph with rows sorted by distance; self-distances are stored as explicit zeros.
+    """
+    return NearestNeighbors(radius=radius).fit(X).radius_neighbors_graph(X, mode='distance', sort_results=True)
+
+
+def threshold_graph(graph, eps):
+    """
+    Keeps only the edges of a radius graph that are at most `eps` long, without a new neighbor search.
+
+    Args:
+    - graph (csr_matrix): Distance graph from radius_graph.
+    - eps (float): Largest distance kept.
+
+    Returns:
+    - csr_matrix: Thresholded distance graph (rows stay sorted by distance).
+    """
+    keep = graph.data <= eps
+    rows = np.repeat(np.arange(graph.shape[0]), np.diff(graph.indptr))
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(rows[keep], minlength=graph.shape[0]))])
+    return sparse.csr_matrix((graph.data[keep], graph.indices[keep], indptr), shape=graph.shape)
+
+
+def k_distance_curve(X, min_samples, sample_weight=None, sample_size=None, random_state=0):
+    """
+    Computes the sorted distances of rows to their min_samples-th nearest neighbor (the row itself included).
+
+    With sample_weight every row counts as that many points, so a row seen min_samples times has distance 0.
+
+    Args:
+    - X (sparse matrix): Feature matrix.
+    - min_samples (int): DBSCAN min_samples.
+    - sample_weight (ndarray): Occurrence count of every row. Default is None.
+    - sample_size (int): Number of query rows drawn with a fixed seed; None queries all rows. Default is None.
+    - random_state (int): Seed of the sample. Default is 0.
+
+    Returns:
+    - ndarray: k-distances in ascending order.
+    """
+    n_samples = X.shape[0]
+    weights = np.ones(n_samples) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+    queries = np.arange(n_samples)
+    if sample_size and sample_size < n_samples:
+        queries = np.sort(np.random.RandomState(random_state).choice(n_samples, sample_size, replace=False))
+    n_neighbors = min(int(np.ceil(min_samples)), n_samples)
+    distances, neighbors = NearestNeighbors(n_neighbors=n_neighbors).fit(X).kneighbors(X[queries])
+    # Position of the first neighbor at which the accumulated weight reaches min_samples
+    reached = np.cumsum(weights[neighbors], axis=1) >= min_samples
+    positions = np.where(reached.any(axis=1), reached.argmax(axis=1), n_neighbors - 1)
+    return np.sort(distances[np.arange(len(queries)), positions])
+
+
+def find_knee(curve):
+    """
+    Finds the knee of an ascending curve: the point farthest below the chord between its ends.
+
+    Args:
+    - curve (ndarray): Ascending values.
+
+    Returns:
+    - int: Index of the knee.
+    """
+    if len(curve) < 3 or curve[-1] == curve[0]:
+        return len(curve) - 1
+    x = np.linspace(0.0, 1.0, len(curve))
+    y = (curve - curve[0]) / (curve[-1] - curve[0])
+    return int(np.argmax(x - y))
 
 
 class LogCluster:
-    def __init__(self, model_file="cluster_model_dbscan.pkl", eps_candidates=[0.1, 0.3, 0.5, 0.7, 1.0], min_samples=5):
+    def __init__(self, model_file="cluster_model_dbscan.pkl", eps_candidates=[0.1, 0.3, 0.5, 0.7, 1.0], min_samples=5,
+                 dedup=True, mask_rules=MASK_RULES, feature_store=None, eps_estimation="knee", knee_sample_size=None):
         self.model_file = model_file
         self.eps_candidates = eps_candidates
         self.min_samples = min_samples
-        self.vectorizer = TfidfVectorizer()
+        self.dedup = dedup
+        self.mask_rules = mask_rules
+        self.feature_store = feature_store or FeatureStore()
+        self.eps_estimation = eps_estimation
+        self.knee_sample_size = knee_sample_size
+        self.vectorizer = None
         self.cluster_model = None
+        self.labels_ = None
+        self.eps_ = None
+        self.k_distances_ = None
 
 
     def fit(self, logs):
@@ -19,39 +109,85 @@ class LogCluster:
         Clusters the logs using DBSCAN algorithm.
 
         Args:
-        - logs (list): List of log lines.
+        - logs (iterable): List of log lines, iterator of lines or iterator of line batches (LogReader).
 
         Returns:
         - dict: Dictionary, where keys are cluster labels, values are a list of logs in each cluster.
         """
-        X = self.vectorizer.fit_transform(logs)
-        distances = euclidean_distances(X)
-        optimal_eps = self._find_optimal_eps(distances)
-        self.cluster_model = DBSCAN(eps=optimal_eps, min_samples=self.min_samples, metric='precomputed')
-        self.cluster_model.fit(distances)
-        joblib.dump(self.cluster_model, self.model_file)
+        logs = as_log_list(logs)
+        # Identical lines (after masking variable tokens) are clustered once, weighted by their count
+        if self.dedup:
+            documents, weights, inverse = deduplicate_logs(logs, self.mask_rules)
+        else:
+            documents, weights, inverse = logs, None, np.arange(len(logs))
+        # Fitted features are reused from the feature store when the same documents were vectorized before
+        features = self.feature_store.features(documents)
+        self.vectorizer = features.vectorizer
+        X = features.matrix
+        if self.eps_estimation == "knee":
+            # eps at the knee of the k-distance curve, then exactly one DBSCAN fit
+            self.eps_ = self._estimate_eps(X, weights)
+            self.cluster_model = DBSCAN(eps=self.eps_, min_samples=self.min_samples)
+            self.cluster_model.fit(X, sample_weight=weights)
+        else:
+            # One neighbor search at the largest candidate eps; every candidate only thresholds this sparse graph
+            graph = radius_graph(X, max(self.eps_candidates))
+            self.eps_ = self._find_optimal_eps(graph, weights)
+            self.cluster_model = DBSCAN(eps=self.eps_, min_samples=self.min_samples, metric='precomputed')
+            self.cluster_model.fit(threshold_graph(graph, self.eps_), sample_weight=weights)
+        self.labels_ = self.cluster_model.labels_[inverse]
+        save_bundle(self.model_file, self.cluster_model, vectorizer=self.vectorizer,
+                    mask_rules=self.mask_rules if self.dedup else None, model=type(self).__name__,
+                    n_samples=len(logs))
         clusters = self._collect_clusters(logs)
         return clusters
 
 
-    def load_model(self):
-        """Loads the clustering model from a file."""
-        self.cluster_model = joblib.load(self.model_file)
+    def load_model(self, mmap_mode='r'):
+        """Loads the clustering model bundle (model, fitted vectorizer and masking rules) from a file."""
+        bundle = load_bundle(self.model_file, mmap_mode)
+        require_vectorizer(bundle, self.model_file)
+        self.cluster_model = bundle["estimator"]
+        self.vectorizer = bundle["vectorizer"]
+        self.mask_rules = bundle["mask_rules"]
 
 
-    def _find_optimal_eps(self, distances):
+    def _estimate_eps(self, X, sample_weight=None):
+        """
+        Estimates epsilon as the knee of the sorted min_samples-th nearest-neighbor distances.
+
+        The curve is kept in k_distances_ for diagnostics.
+
+        Args:
+        - X (sparse matrix): TF-IDF vectors.
+        - sample_weight (ndarray): Occurrence count of every vector. Default is None.
+
+        Returns:
+        - float: Estimated epsilon value.
+        """
+        self.k_distances_ = k_distance_curve(X, self.min_samples, sample_weight, self.knee_sample_size)
+        # Rows repeated at least min_samples times have distance 0 and are core points for any eps,
+        # so the knee is searched on the positive part of the curve
+        positive = self.k_distances_[self.k_distances_ > 0]
+        if len(positive) == 0:
+            return 1e-6
+        return float(positive[find_knee(positive)])
+
+
+    def _find_optimal_eps(self, distances, sample_weight=None):
         """
         Determines the optimal epsilon value for DBSCAN.
 
         Args:
-        - distances (ndarray): Matrix of pairwise distances between vectors.
+        - distances (csr_matrix): Sparse radius graph of distances at the largest candidate eps.
+        - sample_weight (ndarray): Occurrence count of every vector. Default is None.
 
         Returns:
         - float: Optimal epsilon value.
         """
         for eps_candidate in self.eps_candidates:
             dbscan = DBSCAN(eps=eps_candidate, min_samples=self.min_samples, metric='precomputed')
-            dbscan.fit(distances)
+            dbscan.fit(threshold_graph(distances, eps_candidate), sample_weight=sample_weight)
             if len(set(dbscan.labels_)) >= 2:
                 return eps_candidate
         return self.eps_candidates[-1]
@@ -62,16 +198,14 @@ class LogCluster:
         Collects logs into clusters based on the fitted model.
 
         Args:
-        - logs (list): List of log lines.
+        - logs (list or MappedLog): Log lines; for a MappedLog the clusters are lazy views over line indices.
 
         Returns:
         - dict: Dictionary, where keys are cluster labels, values are a list of logs in each cluster.
         """
         clusters = {}
-        for i, label in enumerate(self.cluster_model.labels_):
-            if label not in clusters:
-                clusters[label] = []
-            clusters[label].append(logs[i])
+        for label, indices in group_labels(self.labels_).items():
+            clusters[label] = take_lines(logs, indices)
         return clusters
 
 
@@ -1,58 +1,187 @@
 # clustering.py
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
-from sklearn.metrics import silhouette_score
-import joblib
+from sklearn.cluster import KMeans, MiniBatchKMeans
+import numpy as np
+from scipy import sparse
+from utils.parser_log import as_log_list, iter_log_lines
+from utils.mapped_log import group_labels, take_lines
+from utils.dedup import MASK_RULES, deduplicate_logs, mask_log
+from utils.feature_store import FeatureStore
+from utils.hashed_features import StreamingTfidf
+from utils.model_bundle import load_bundle, require_vectorizer, save_bundle
+from utils.cluster_selection import silhouette_sweep
 
 
 class LogClusterKMeans:
-    def __init__(self, model_file="cluster_model.pkl"):
+    def __init__(self, model_file="cluster_model.pkl", dedup=True, mask_rules=MASK_RULES, feature_store=None,
+                 max_clusters=10, silhouette_sample_size=10000, minibatch=False, workers=1, random_state=0,
+                 new_cluster_threshold=None):
         self.model_file = model_file
-        self.vectorizer = TfidfVectorizer()
+        self.dedup = dedup
+        self.mask_rules = mask_rules
+        self.feature_store = feature_store or FeatureStore()
+        self.max_clusters = max_clusters
+        self.silhouette_sample_size = silhouette_sample_size
+        self.minibatch = minibatch
+        self.workers = workers
+        self.random_state = random_state
+        self.new_cluster_threshold = new_cluster_threshold
+        self.vectorizer = None
         self.kmeans = None
+        self.labels_ = None
+        self.cluster_counts_ = None
+        self.silhouette_scores_ = None
+        self._best_centers = None
 
 
-    def determine_optimal_clusters(self, X):
+    def determine_optimal_clusters(self, X, sample_weight=None):
         n_samples = X.shape[0]
-        if n_samples <= 1:
+        self._best_centers = None
+        if n_samples <= 2:
             return 1
-        max_clusters = min(n_samples - 1, 10)  # Maximum number of clusters - 10
-        scores = []
-        for n_clusters in range(2, max_clusters + 1):
-            kmeans = KMeans(n_clusters=n_clusters)
-            kmeans.fit(X)
-            score = silhouette_score(X, kmeans.labels_)
-            scores.append(score)
-        return scores.index(max(scores)) + 2  # Return the optimal number of clusters
+        max_clusters = min(n_samples - 1, self.max_clusters)
+        # Candidates are fitted in parallel and scored on a fixed-seed silhouette sample
+        n_clusters, self.silhouette_scores_, self._best_centers = silhouette_sweep(
+            X, range(2, max_clusters + 1), sample_weight, sample_size=self.silhouette_sample_size,
+            minibatch=self.minibatch, workers=self.workers, random_state=self.random_state)
+        return n_clusters
 
 
     def fit(self, logs):
-        X = self.vectorizer.fit_transform(logs)
-        n_clusters = self.determine_optimal_clusters(X)
-        self.kmeans = KMeans(n_clusters=n_clusters)
-        self.kmeans.fit(X)
+        logs = as_log_list(logs)
+        # Identical lines (after masking variable tokens) are clustered once, weighted by their count
+        if self.dedup:
+            documents, weights, inverse = deduplicate_logs(logs, self.mask_rules)
+        else:
+            documents, weights, inverse = logs, None, np.arange(len(logs))
+        # Fitted features are reused from the feature store when the same documents were vectorized before
+        features = self.feature_store.features(documents)
+        self.vectorizer = features.vectorizer
+        X = features.matrix
+        n_clusters = self.determine_optimal_clusters(X, weights)
+        if self._best_centers is None:
+            self.kmeans = KMeans(n_clusters=n_clusters, random_state=self.random_state)
+        else:
+            # Warm start from the winning candidate instead of refitting from scratch
+            self.kmeans = KMeans(n_clusters=n_clusters, init=self._best_centers, n_init=1,
+                                 random_state=self.random_state)
+        self.kmeans.fit(X, sample_weight=weights)
+        self.labels_ = self.kmeans.labels_[inverse]
+        self.cluster_counts_ = np.bincount(self.labels_, minlength=n_clusters).astype(np.float64)
         self.save_model()
         return self._collect_clusters(logs)
 
 
+    def partial_fit(self, logs):
+        """
+        Assigns a new batch of logs to the existing clusters and updates them incrementally.
+
+        The previous model is loaded from model_file (a full fit is done if there is none, or if it is a
+        legacy model without a fitted vectorizer). Every line
+        is assigned to its nearest centroid in O(batch * k); centroids are moved towards the batch as
+        running means weighted by the number of lines seen so far. When new_cluster_threshold is set,
+        lines farther than it from every centroid spawn new clusters instead. The vocabulary of the
+        vectorizer stays the one of the first fit.
+
+        Args:
+        - logs (iterable): List of log lines, iterator of lines or iterator of line batches (LogReader).
+
+        Returns:
+        - dict: Clusters of the batch, keys are cluster labels, values are lists of logs.
+        """
+        logs = as_log_list(logs)
+        if self.kmeans is None:
+            try:
+                # Centroids are updated in place, so they are loaded into memory instead of memory-mapped
+                bundle = load_bundle(self.model_file, mmap_mode=None)
+            except FileNotFoundError:
+                return self.fit(logs)
+            if bundle["vectorizer"] is None:
+                # A legacy bare KMeans has no vocabulary to assign the batch with, so it is refitted
+                return self.fit(logs)
+            self._use_bundle(bundle)
+        if self.dedup:
+            documents, weights, inverse = deduplicate_logs(logs, self.mask_rules)
+        else:
+            documents, weights, inverse = logs, np.ones(len(logs)), np.arange(len(logs))
+        X = self.vectorizer.transform(documents)
+        centers = np.array(self.kmeans.cluster_centers_, dtype=np.float64)
+        distances = self.kmeans.transform(X)
+        labels = distances.argmin(axis=1)
+        if self.new_cluster_threshold is not None:
+            labels, centers = self._spawn_clusters(X, labels, distances.min(axis=1), centers)
+
+        # Running-mean update of the centroids that received lines of the batch
+        counts = np.zeros(len(centers))
+        counts[:len(self.cluster_counts_)] = self.cluster_counts_
+        batch_counts = np.bincount(labels, weights=weights, minlength=len(centers))
+        assignment = sparse.csr_matrix((weights, (labels, np.arange(len(labels)))), shape=(len(centers), len(labels)))
+        batch_sums = assignment @ X
+        touched = batch_counts > 0
+        centers[touched] = ((centers[touched] * counts[touched, None] + batch_sums[touched].toarray())
+                            / (counts[touched] + batch_counts[touched])[:, None])
+        self.cluster_counts_ = counts + batch_counts
+        self.kmeans.cluster_centers_ = centers
+        self.kmeans.n_clusters = len(centers)
+        self.labels_ = labels[inverse]
+        self.save_model()
+        return self._collect_clusters(logs)
+
+
+    def _spawn_clusters(self, X, labels, min_distances, centers):
+        """Creates a new centroid for every line that is farther than the threshold from all centroids."""
+        new_centers = []
+        for row in np.flatnonzero(min_distances > self.new_cluster_threshold):
+            point = X[row].toarray().ravel()
+            if new_centers:
+                distances = np.linalg.norm(np.array(new_centers) - point, axis=1)
+                if distances.min() <= self.new_cluster_threshold:
+                    labels[row] = len(centers) + int(distances.argmin())
+                    continue
+            labels[row] = len(centers) + len(new_centers)
+            new_centers.append(point)
+        if new_centers:
+            centers = np.vstack([centers, new_centers])
+        return labels, centers
+
+
     def _collect_clusters(self, logs):
         clusters = {}
-        for i, label in enumerate(self.kmeans.labels_):
-            if label not in clusters:
-                clusters[label] = []
-            clusters[label].append(logs[i])
+        for label, indices in group_labels(self.labels_).items():
+            clusters[label] = take_lines(logs, indices)
         return clusters
 
 
     def save_model(self):
-        joblib.dump(self.kmeans, self.model_file)
+        save_bundle(self.model_file, self.kmeans, vectorizer=self.vectorizer,
+                    mask_rules=self.mask_rules if self.dedup else None, model=type(self).__name__,
+                    n_clusters=int(self.kmeans.n_clusters), cluster_counts=self.cluster_counts_.tolist())
+
+
+    def load_model(self, mmap_mode='r'):
+        """
+        Loads the model bundle (centroids, cluster sizes, fitted vectorizer and masking rules).
+
+        Args:
+        - mmap_mode (str): joblib memory-mapping mode. Default is 'r'.
 
+        Raises:
+        - ValueError: If the file is a legacy model without a fitted vectorizer.
+        """
+        bundle = load_bundle(self.model_file, mmap_mode)
+        require_vectorizer(bundle, self.model_file)
+        self._use_bundle(bundle)
 
-    def load_model(self):
-        self.kmeans = joblib.load(self.model_file)
+
+    def _use_bundle(self, bundle):
+        self.kmeans = bundle["estimator"]
+        self.cluster_counts_ = np.array(bundle["metadata"].get("cluster_counts", np.ones(self.kmeans.n_clusters)))
+        self.vectorizer = bundle["vectorizer"]
+        self.mask_rules = bundle["mask_rules"]
 
 
     def predict(self, logs):
+        if self.dedup and self.mask_rules:
+            logs = [mask_log(log, self.mask_rules) for log in logs]
         X = self.vectorizer.transform(logs)
         return self.kmeans.predict(X)
 
@@ -63,3 +192,143 @@ class LogClusterKMeans:
             for log in logs:
                 print(f"  {log}")
             print()
+
+
+class StreamingLogClusterKMeans:
+    """
+    Streaming variant of LogClusterKMeans for logs that do not fit in memory.
+
+    Chunks of lines are featurized with StreamingTfidf (hashed counts + online IDF) and fed to
+    MiniBatchKMeans.partial_fit, so memory stays constant regardless of the size of the log.
+    """
+    def __init__(self, n_clusters=8, batch_size=10000, n_features=2 ** 18, model_file="cluster_model_streaming.pkl",
+                 dedup=True, mask_rules=MASK_RULES, random_state=None):
+        self.n_clusters = n_clusters
+        self.batch_size = batch_size
+        self.model_file = model_file
+        self.dedup = dedup
+        self.mask_rules = mask_rules
+        self.featurizer = StreamingTfidf(n_features=n_features)
+        self.kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state, n_init=3)
+        self._pending = []
+        self._read_only = False
+
+
+    def _batches(self, logs):
+        batch = []
+        for log in iter_log_lines(logs):
+            batch.append(log)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+    def _documents(self, logs):
+        if self.dedup:
+            return deduplicate_logs(logs, self.mask_rules)
+        return logs, None, np.arange(len(logs))
+
+
+    def partial_fit(self, logs):
+        """
+        Updates the IDF estimate and the cluster centers with one chunk of log lines.
+
+        Args:
+        - logs (list): Chunk of log lines.
+
+        Returns:
+        - StreamingLogClusterKMeans: self.
+        """
+        if self._read_only:
+            # A memory-mapped model can not be updated in place
+            self.load_model(mmap_mode=None)
+        documents, weights, _ = self._documents(logs)
+        X = self.featurizer.partial_fit_transform(documents, weights)
+        weights = np.ones(X.shape[0]) if weights is None else weights
+        if not hasattr(self.kmeans, 'cluster_centers_'):
+            # MiniBatchKMeans needs at least n_clusters distinct rows for its first step
+            self._pending.append((X, weights))
+            if sum(X.shape[0] for X, _ in self._pending) >= self.n_clusters:
+                self._flush_pending()
+            return self
+        self.kmeans.partial_fit(X, sample_weight=weights)
+        return self
+
+
+    def _flush_pending(self):
+        X = sparse.vstack([X for X, _ in self._pending]).tocsr()
+        weights = np.concatenate([weights for _, weights in self._pending])
+        self._pending = []
+        self.kmeans.set_params(n_clusters=min(self.n_clusters, X.shape[0]))
+        self.kmeans.partial_fit(X, sample_weight=weights)
+
+
+    def fit(self, logs):
+        """
+        Clusters a log chunk by chunk.
+
+        Args:
+        - logs (iterable): List of log lines, iterator of lines or iterator of line batches (LogReader).
+
+        Returns:
+        - StreamingLogClusterKMeans: self.
+        """
+        for batch in self._batches(logs):
+            self.partial_fit(batch)
+        if self._pending:
+            # Fewer distinct rows than clusters in the whole log
+            self._flush_pending()
+        self.save_model()
+        return self
+
+
+    def predict(self, logs):
+        """
+        Assigns log lines to the learned clusters.
+
+        Args:
+        - logs (list): Log lines.
+
+        Returns:
+        - ndarray: Cluster label of every line.
+        """
+        documents, _, inverse = self._documents(logs)
+        return self.kmeans.predict(self.featurizer.transform(documents))[inverse]
+
+
+    def iter_clusters(self, logs):
+        """
+        Labels a log chunk by chunk after fit, without keeping the log in memory.
+
+        Args:
+        - logs (iterable): List of log lines, iterator of lines or iterator of line batches (LogReader).
+
+        Returns:
+        - generator: Pairs of (chunk of log lines, cluster labels of the chunk).
+        """
+        for batch in self._batches(logs):
+            yield batch, self.predict(batch)
+
+
+    def save_model(self):
+        save_bundle(self.model_file, self.kmeans, vectorizer=self.featurizer,
+                    mask_rules=self.mask_rules if self.dedup else None, model=type(self).__name__,
+                    n_clusters=int(self.kmeans.n_clusters), n_documents=self.featurizer.n_documents)
+
+
+    def load_model(self, mmap_mode=None):
+        """
+        Loads the model bundle.
+
+        Args:
+        - mmap_mode (str): joblib memory-mapping mode. Default is None (in memory, ready for partial_fit);
+          'r' shares read-only arrays between scoring processes, and partial_fit reloads them into memory.
+        """
+        bundle = load_bundle(self.model_file, mmap_mode)
+        require_vectorizer(bundle, self.model_file)
+        self.kmeans = bundle["estimator"]
+        self.featurizer = bundle["vectorizer"]
+        self.mask_rules = bundle["mask_rules"]
+        self._read_only = mmap_mode is not None
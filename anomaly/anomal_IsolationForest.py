@@ -1,18 +1,31 @@
-import re
-from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.ensemble import IsolationForest
 import matplotlib.pyplot as plt
-from utils.proccess_log_file import preprocess_logs
+from utils.parse_cache import load_preprocessed_logs
+from utils.feature_store import FeatureStore
+from utils.keyword_matcher import get_keyword_matcher
 
 
-def find_anomalies(log_file, contamination=0.1, random_state=42):
+# Built-in categories, checked before the user keyword dictionary
+ANOMALY_KEYWORDS = [
+    ('Error', ['error', 'exception', 'fail']),
+    ('Warning', ['warning', 'alert']),
+    ('Info', ['info', 'information']),
+    ('Timing', ['timeout', 'timed out']),
+]
+
+
+def find_anomalies(log_file, contamination=0.1, random_state=42, cache_dir=None, feature_store=None,
+                   preprocess_params=None):
     """
     Функция для поиска аномалий в логах с использованием Isolation Forest.
 
     Args:
-    - log_file (str): Путь к файлу с логами.
+    - log_file (str or MappedLog): Путь к файлу с логами или уже отображённый в память лог.
     - contamination (float): Уровень контаминации (доля аномалий). По умолчанию 0.1.
     - random_state (int): Семя для генерации случайных чисел. По умолчанию None.
+    - cache_dir (str): Каталог кэша разбора логов. По умолчанию None (без кэша).
+    - feature_store (FeatureStore): Кэш TF-IDF признаков. По умолчанию None (хранилище в памяти).
+    - preprocess_params (dict): Параметры preprocess_logs (tokenizer, stopword_source). По умолчанию None.
 
     Returns:
     - tuple: Кортеж, содержащий три элемента:
@@ -20,20 +33,15 @@ def find_anomalies(log_file, contamination=0.1, random_state=42):
              2. Список всех строк логов с метками о том, является ли строка аномальной или нет.
              3. Список всех строк логов.
     """
-    # Читаем содержимое файла логов
+    # Читаем содержимое файла логов и предобрабатываем логи (из кэша, если файл не изменился)
     try:
-        with open(log_file, 'r') as file:
-            logs = file.readlines()
+        logs, preprocessed_logs = load_preprocessed_logs(log_file, cache_dir, **(preprocess_params or {}))
     except FileNotFoundError:
         print(f"Ошибка: Файл {log_file} не найден.")
         return [], [], []
 
-    # Предобрабатываем логи
-    preprocessed_logs = preprocess_logs(logs)
-
-    # Преобразуем предобработанные логи в числовые векторы с помощью TF-IDF
-    vectorizer = TfidfVectorizer()
-    X = vectorizer.fit_transform(preprocessed_logs)
+    # Преобразуем предобработанные логи в числовые векторы с помощью TF-IDF (один раз на набор данных)
+    X = (feature_store or FeatureStore()).features(preprocessed_logs).matrix
 
     # Обучаем модель Isolation Forest на данных логов
     isolation_forest = IsolationForest(contamination=contamination, random_state=random_state)
@@ -44,7 +52,8 @@ def find_anomalies(log_file, contamination=0.1, random_state=42):
     anomalies = [logs[i].strip() for i in anomalies_indices]
 
     # Создаем список всех строк логов с метками о том, является ли строка аномальной
-    all_logs_with_labels = [(log.strip(), 'Anomalous' if i in anomalies_indices else 'Normal') for i, log in enumerate(logs)]
+    anomalies_set = set(anomalies_indices)
+    all_logs_with_labels = [(log.strip(), 'Anomalous' if i in anomalies_set else 'Normal') for i, log in enumerate(logs)]
 
     return anomalies, all_logs_with_labels, logs
 
@@ -59,22 +68,12 @@ def classify_anomalies(anomalies, keyword_dict):
     Returns:
     - dict: Dictionary containing the classification of anomalous strings.
     """
-    classified_anomalies = {'Error': [], 'Warning': [], 'Info': [], 'Timing': []}
-    for anomaly in anomalies:
-        if re.search(r'error|exception|fail', anomaly, re.IGNORECASE):
-            classified_anomalies['Error'].append(anomaly)
-        elif re.search(r'warning|alert', anomaly, re.IGNORECASE):
-            classified_anomalies['Warning'].append(anomaly)
-        elif re.search(r'info|information', anomaly, re.IGNORECASE):
-            classified_anomalies['Info'].append(anomaly)
-        elif re.search(r'timeout|timed out', anomaly, re.IGNORECASE):
-            classified_anomalies['Timing'].append(anomaly)
-        else:
-            category = analyze_log_text(anomaly, keyword_dict)
-            if category:
-                classified_anomalies[category].append(anomaly)
-            else:
-                classified_anomalies.setdefault('Other', []).append(anomaly)
+    # Built-in categories first, then the keyword dictionary, all in one compiled matcher
+    matcher = get_keyword_matcher(ANOMALY_KEYWORDS + list((keyword_dict or {}).items()), ignore_case=True,
+                                  default='Other')
+    classified_anomalies = {category: [] for category, _ in ANOMALY_KEYWORDS}
+    for anomaly, category in zip(anomalies, matcher.categorize(anomalies)):
+        classified_anomalies.setdefault(category, []).append(anomaly)
     return classified_anomalies
 
 
@@ -89,8 +88,4 @@ def analyze_log_text(log_text, keyword_dict):
     Returns:
     - str: Category of the anomaly or None if classification failed.
     """
-    for status, keywords in keyword_dict.items():
-        for keyword in keywords:
-            if keyword.lower() in log_text.lower():
-                return status
-    return None
+    return get_keyword_matcher(keyword_dict, ignore_case=True).match(log_text)
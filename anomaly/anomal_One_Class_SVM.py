@@ -1,19 +1,23 @@
 import re
-from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.svm import OneClassSVM
 import matplotlib.pyplot as plt
-from utils.proccess_log_file import preprocess_logs
-from utils.analyze_log_text import analyze_log_text
+from utils.analyze_log_text import categorize_logs
+from utils.parse_cache import load_preprocessed_logs
+from utils.feature_store import FeatureStore
 
-def find_anomalies_svm(log_file, nu=0.1, kernel="rbf", gamma="scale"):
+def find_anomalies_svm(log_file, nu=0.1, kernel="rbf", gamma="scale", cache_dir=None, feature_store=None,
+                       preprocess_params=None):
     """
    Function for searching for anomalies in logs using One-Class SVM.
 
     Args:
-    - log_file (str): Path to the log file.
+    - log_file (str or MappedLog): Path to the log file or an already memory-mapped log.
     - nu (float): nu parameter for One-Class SVM. Default is 0.1.
     - kernel (str): Kernel for One-Class SVM. Default is "rbf".
     - gamma (str): gamma parameter for One-Class SVM. Default is "scale".
+    - cache_dir (str): Parse cache directory. Default is None (no cache).
+    - feature_store (FeatureStore): TF-IDF feature cache. Default is None (an in-memory store).
+    - preprocess_params (dict): Parameters for preprocess_logs (tokenizer, stopword_source). Default is None.
 
     Returns:
     - tuple: A tuple containing three elements:
@@ -21,13 +25,9 @@ def find_anomalies_svm(log_file, nu=0.1, kernel="rbf", gamma="scale"):
              2. A list of all log lines with labels indicating whether the line is anomalous or not.
              3. List of all log lines.
     """
-    with open(log_file, 'r') as file:
-        logs = file.readlines()
+    logs, preprocessed_logs = load_preprocessed_logs(log_file, cache_dir, **(preprocess_params or {}))
 
-    preprocessed_logs = preprocess_logs(logs)
-
-    vectorizer = TfidfVectorizer()
-    X = vectorizer.fit_transform(preprocessed_logs)
+    X = (feature_store or FeatureStore()).features(preprocessed_logs).matrix
 
     oc_svm = OneClassSVM(nu=nu, kernel=kernel, gamma=gamma)
     oc_svm.fit(X)
@@ -35,7 +35,8 @@ def find_anomalies_svm(log_file, nu=0.1, kernel="rbf", gamma="scale"):
     anomalies_indices = [i for i, decision in enumerate(oc_svm.decision_function(X)) if decision < 0]
     anomalies = [logs[i].strip() for i in anomalies_indices]
 
-    all_logs_with_labels = [(log.strip(), 'Anomalous' if i in anomalies_indices else 'Normal') for i, log in enumerate(logs)]
+    anomalies_set = set(anomalies_indices)
+    all_logs_with_labels = [(log.strip(), 'Anomalous' if i in anomalies_set else 'Normal') for i, log in enumerate(logs)]
 
     return anomalies, all_logs_with_labels, logs
 
@@ -43,8 +44,7 @@ def classify_anomalies(anomalies, keyword_dict):
     classified_anomalies = {status: [] for status in keyword_dict.keys()}
     classified_anomalies["Other"] = []
 
-    for anomaly in anomalies:
-        category = analyze_log_text(anomaly, keyword_dict)
+    for anomaly, category in zip(anomalies, categorize_logs(anomalies, keyword_dict)):
         classified_anomalies[category].append(anomaly)
 
     return classified_anomalies
@@ -2,22 +2,27 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.neighbors import LocalOutlierFactor
 import matplotlib.pyplot as plt
 import re
-from utils.proccess_log_file import preprocess_logs
-from utils.analyze_log_text import analyze_log_text
+from utils.analyze_log_text import categorize_logs
+from utils.parse_cache import load_preprocessed_logs
+from utils.feature_store import FeatureStore
 
 
 def find_anomalies_lof(log_file, contamination=0.1, n_neighbors=20, algorithm='auto',
-                       vectorizer_params=None, lof_params=None):
+                       vectorizer_params=None, lof_params=None, cache_dir=None, feature_store=None,
+                       preprocess_params=None):
     """
     Function for searching for anomalies in logs using Local Outlier Factor.
 
     Args:
-    - log_file (str): Path to the log file.
+    - log_file (str or MappedLog): Path to the log file or an already memory-mapped log.
     - contamination (float): Level of contamination (proportion of anomalies). Default is 0.1.
     - n_neighbors (int): Number of neighbors for LOF. Default is 20.
     - algorithm (str): Algorithm for LOF. Default is "auto".
     - vectorizer_params (dict): Parameters for TfidfVectorizer. Default is None.
     - lof_params (dict): Parameters for Local Outlier Factor. Default is None.
+    - cache_dir (str): Parse cache directory. Default is None (no cache).
+    - feature_store (FeatureStore): TF-IDF feature cache. Default is None (an in-memory store).
+    - preprocess_params (dict): Parameters for preprocess_logs (tokenizer, stopword_source). Default is None.
 
     Returns:
     - tuple: A tuple containing three elements:
@@ -26,17 +31,13 @@ def find_anomalies_lof(log_file, contamination=0.1, n_neighbors=20, algorithm='a
              3. List of all log lines.
     """
     try:
-        with open(log_file, 'r') as file:
-            logs = file.readlines()
+        logs, preprocessed_logs = load_preprocessed_logs(log_file, cache_dir, **(preprocess_params or {}))
     except FileNotFoundError:
         print(f"Ошибка: Файл {log_file} не найден.")
         return [], [], []
 
-    preprocessed_logs = preprocess_logs(logs)
-
     vectorizer_params = vectorizer_params or {}
-    vectorizer = TfidfVectorizer(**vectorizer_params)
-    X = vectorizer.fit_transform(preprocessed_logs)
+    X = (feature_store or FeatureStore()).features(preprocessed_logs, **vectorizer_params).matrix
 
     lof_params = lof_params or {}
     lof = LocalOutlierFactor(contamination=contamination, n_neighbors=n_neighbors, algorithm=algorithm, **lof_params)
@@ -45,7 +46,8 @@ def find_anomalies_lof(log_file, contamination=0.1, n_neighbors=20, algorithm='a
     anomalies_indices = [i for i, prediction in enumerate(predictions) if prediction == -1]
     anomalies = [logs[i].strip() for i in anomalies_indices]
 
-    all_logs_with_labels = [(log.strip(), 'Anomalous' if i in anomalies_indices else 'Normal') for i, log in
+    anomalies_set = set(anomalies_indices)
+    all_logs_with_labels = [(log.strip(), 'Anomalous' if i in anomalies_set else 'Normal') for i, log in
                             enumerate(logs)]
 
     return anomalies, all_logs_with_labels, logs
@@ -79,8 +81,7 @@ def classify_anomalies(anomalies, keyword_dict):
     classified_anomalies = {status: [] for status in keyword_dict.keys()}
     classified_anomalies["Other"] = []
 
-    for anomaly in anomalies:
-        category = analyze_log_text(anomaly, keyword_dict)
+    for anomaly, category in zip(anomalies, categorize_logs(anomalies, keyword_dict)):
         if category in classified_anomalies:
             classified_anomalies[category].append(anomaly)
         else:
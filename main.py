@@ -1,26 +1,36 @@
+import os
 from utils.parser_log import parse_log, remove_stopwords
+from utils.stopwords import get_stopwords
+from utils.parse_cache import CACHE_DIR, cached_parse
+from utils.feature_store import FeatureStore
 from algo.KMEANS.clustering import LogClusterKMeans
-from algo.KMEANS.classification import LogClassifier
-from algo.DBSCAN.clustering import LogCluster
-from algo.DBSCAN.classification import LogClassifier
-from algo.AGGLOMERATIVE.clustering import LogCluster
-from algo.AGGLOMERATIVE.classification import LogClassifier
-from algo.COSINE_KMEANS.clustering import LogCluster
-from algo.COSINE_KMEANS.classification import LogClassifier
-from algo.BRAIN.clustering import LogParser
-from algo.AEL.clustering import LogParser
+from algo.KMEANS.classification import LogClassifier as KMeansLogClassifier
+from algo.DBSCAN.clustering import LogCluster as DBSCANLogCluster
+from algo.DBSCAN.classification import LogClassifier as DBSCANLogClassifier
+from algo.AGGLOMERATIVE.clustering import LogCluster as AgglomerativeLogCluster
+from algo.AGGLOMERATIVE.classification import LogClassifier as AgglomerativeLogClassifier
+from algo.COSINE_KMEANS.clustering import LogCluster as CosineLogCluster
+from algo.COSINE_KMEANS.classification import LogClassifier as CosineLogClassifier
+from algo.BRAIN.clustering import LogParser as BrainLogParser
+from algo.AEL.clustering import LogParser as AELLogParser
 from anomaly.anomal_IsolationForest import find_anomalies, classify_anomalies
 from anomaly.anomal_One_Class_SVM import find_anomalies_svm
 from anomaly.anomaly_Local_Outlier_Factor import find_anomalies_lof
-from algo.BRAIN.clustering import LogParser
 
 
-def main(algorithm="KMEANS",anomaly=None, keyword_dict=None, stopwords=None, log_format = '<Date> <Time> <Pid> <Level> <Component>: <Content>'):
+def main(algorithm="KMEANS",anomaly=None, keyword_dict=None, stopwords=None, log_format = '<Date> <Time> <Pid> <Level> <Component>: <Content>',
+         cache_dir=CACHE_DIR, bundled_stopwords=False, preprocess_params=None):
     """
      Function for running the log processing algorithm.
 
      Args:
      - algorithm (str): Algorithm name (default "KMEANS").
+     - stopwords (list): Stopwords removed from the logs (default None - none are removed).
+     - cache_dir (str): Parse cache directory; a rerun on an unchanged log skips ingestion (None disables it).
+       TF-IDF features are cached in its "features" subdirectory.
+     - bundled_stopwords (bool): Also remove the bundled stopwords/words.txt list (default False).
+     - preprocess_params (dict): preprocess_logs parameters of the anomaly search, e.g.
+       {"tokenizer": "regex", "stopword_source": "sklearn"} to run without NLTK data (default None - NLTK).
 
      Returns:
      - None
@@ -30,51 +40,54 @@ def main(algorithm="KMEANS",anomaly=None, keyword_dict=None, stopwords=None, log
     # Path to the log file
     log_file = "log.txt"
 
-    # Parsing logs
-    logs = parse_log(log_file)
+    # Parsing logs (loaded from the parse cache when the log file is unchanged)
+    logs = parse_log(log_file) if cache_dir is None else cached_parse(log_file, cache_dir, tokens=False)["raw"]
+
+    # Fitted TF-IDF features are cached per dataset, so a rerun on the same data skips vectorization
+    feature_store = FeatureStore(os.path.join(cache_dir, "features") if cache_dir else None)
 
     # Remove stop words (optional)
-    logs_cleaned = remove_stopwords(logs, stopwords)
+    logs_cleaned = remove_stopwords(logs, get_stopwords(stopwords, bundled=bundled_stopwords))
 
     if algorithm == "KMEANS":
-        log_cluster = LogClusterKMeans()
+        log_cluster = LogClusterKMeans(feature_store=feature_store)
         clustered_logs = log_cluster.fit(logs)
         log_cluster.pretty_print_clusters(clustered_logs)
 
-        log_classifier = LogClassifier()
+        log_classifier = KMeansLogClassifier()
         classified_logs = log_classifier.classify(logs, clustered_logs)
         log_classifier.pretty_print_classification(classified_logs)
 
     if algorithm == "DBSCAN":
-        log_cluster = LogCluster()
+        log_cluster = DBSCANLogCluster(feature_store=feature_store)
         clustered_logs = log_cluster.fit(logs)
         log_cluster.pretty_print_clusters(clustered_logs)
 
         # Классификация логов
-        log_classifier = LogClassifier()
+        log_classifier = DBSCANLogClassifier()
         classified_logs = log_classifier.classify(logs, clustered_logs)
         log_classifier.pretty_print_classification(classified_logs)
 
     if algorithm == "AGGLOMERATIVE":
-        log_cluster = LogCluster(n_clusters=3)
+        log_cluster = AgglomerativeLogCluster(n_clusters=3, feature_store=feature_store)
         clustered_logs = log_cluster.fit(logs)
         log_cluster.pretty_print_clusters(clustered_logs)
 
-        log_classifier = LogClassifier()
+        log_classifier = AgglomerativeLogClassifier()
         classified_logs = log_classifier.classify(clustered_logs)
         log_classifier.pretty_print_classification(classified_logs)
 
     if algorithm == "COSINE_KMEANS":
-        log_cluster = LogCluster(max_clusters=5)
+        log_cluster = CosineLogCluster(max_clusters=5, feature_store=feature_store)
         clustered_logs = log_cluster.fit(logs)
         log_cluster.pretty_print_clusters(clustered_logs)
 
-        log_classifier = LogClassifier()
+        log_classifier = CosineLogClassifier()
         classified_logs = log_classifier.classify(logs, clustered_logs)
         log_classifier.pretty_print_classification(classified_logs)
 
     if algorithm == "BRAIN":
-        parser = LogParser(log_format)
+        parser = BrainLogParser(log_format)
         parsed_logs, templates = parser.parse(logs)
 
         print("Parsed Logs:")
@@ -82,7 +95,7 @@ def main(algorithm="KMEANS",anomaly=None, keyword_dict=None, stopwords=None, log
             print(log)
 
     if algorithm == "AEL":
-        parser = LogParser(log_format)
+        parser = AELLogParser(log_format)
         parsed_logs = parser.parse(logs)
 
         print("Parsed Logs:")
@@ -90,7 +103,8 @@ def main(algorithm="KMEANS",anomaly=None, keyword_dict=None, stopwords=None, log
             print(log)
 
     if anomaly == "IsolationForest":
-        anomalies, all_logs_with_labels, logs = find_anomalies(log_file)
+        anomalies, all_logs_with_labels, logs = find_anomalies(log_file, cache_dir=cache_dir, feature_store=feature_store,
+                                                               preprocess_params=preprocess_params)
         print("=== Extended result report ===")
         print(f"Total log lines: {len(logs)}")
         print(f"Number of anomalous lines: {len(anomalies)}")
@@ -112,7 +126,8 @@ def main(algorithm="KMEANS",anomaly=None, keyword_dict=None, stopwords=None, log
                 print(log)
 
     if anomaly == "OneClassSVM":
-        anomalies, all_logs_with_labels, logs = find_anomalies_svm(log_file)
+        anomalies, all_logs_with_labels, logs = find_anomalies_svm(log_file, cache_dir=cache_dir, feature_store=feature_store,
+                                                                   preprocess_params=preprocess_params)
 
         print("=== Extended result report ===")
         print(f"Total log lines: {len(logs)}")
@@ -134,7 +149,8 @@ def main(algorithm="KMEANS",anomaly=None, keyword_dict=None, stopwords=None, log
                 print(log)
 
     if anomaly == "LocalOutlierFactor":
-        anomalies, all_logs_with_labels, logs = find_anomalies_lof(log_file)
+        anomalies, all_logs_with_labels, logs = find_anomalies_lof(log_file, cache_dir=cache_dir, feature_store=feature_store,
+                                                                   preprocess_params=preprocess_params)
 
         print("=== Extended result report ===")
         print(f"Total log lines: {len(logs)}")
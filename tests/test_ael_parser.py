@@ -0,0 +1,45 @@
+from algo.AEL.clustering import Event, LogParser
+
+
+LOG_FORMAT = '<Date> <Time> <Pid> <Level> <Component>: <Content>'
+
+
+def make_log(i, content):
+    return f"2024-05-27 12:00:{i % 60:02d} {1000 + i} INFO Component: {content}"
+
+
+def test_categorize_groups_identical_contents():
+    contents = ["open file a", "open file b", "open file a", "close disk", "open file a"]
+    parser = LogParser(LOG_FORMAT)
+    parser.log = [make_log(i, content) for i, content in enumerate(contents)]
+    parser.load_data()
+    parser.tokenize()
+    parser.categorize()
+
+    events = parser.bins[(3, 0)]["Events"]
+    assert [event.Eventstr for event in events] == ["open file a", "open file b"]
+    assert events[0].logs == [0, 2, 4]
+    assert parser.bins[(2, 0)]["Events"][0].logs == [3]
+
+
+def pairwise_groups(parser, events):
+    groups = []
+    for e1 in events:
+        if e1.merged:
+            continue
+        e1.merged = True
+        groups.append([e1])
+        for e2 in events:
+            if not e2.merged and parser.has_diff(e1.EventToken, e2.EventToken):
+                groups[-1].append(e2)
+                e2.merged = True
+    return [[event.Eventstr for event in group] for group in groups]
+
+
+def test_group_events_matches_pairwise_has_diff():
+    contents = ["a b c d", "a b c e", "a x c e", "y x z e", "a b c  d", "<*> b c d", "y y z e"]
+    for merge_percent in (0, 0.25, 0.5, 0.75, 1):
+        parser = LogParser(LOG_FORMAT, merge_percent=merge_percent)
+        expected = pairwise_groups(parser, [Event(i, content) for i, content in enumerate(contents)])
+        groups = parser.group_events([Event(i, content) for i, content in enumerate(contents)])
+        assert [[event.Eventstr for event in group] for group in groups] == expected
@@ -0,0 +1,30 @@
+from algo.AGGLOMERATIVE.clustering import LogCluster
+from utils.parser_log import parse_log
+from utils.union_find import UnionFind
+
+
+def test_summarized_ward_labels_every_line(tmp_path):
+    logs = parse_log("log.txt")[:600]
+    model = LogCluster(n_clusters=3, model_file=str(tmp_path / "agg.pkl"), max_dense_samples=100, n_summaries=50)
+    clusters = model.fit(logs)
+    assert len(model.labels_) == len(logs)
+    assert len(model.cluster_model.labels_) == 50, "Ward linkage did not run on the summaries"
+    assert sum(len(cluster["logs"]) for cluster in clusters.values()) == len(logs)
+
+
+def test_merge_joins_similar_clusters_transitively(tmp_path):
+    logs = parse_log("log.txt")[:300]
+    model = LogCluster(n_clusters=4, merge_threshold=-1.0, model_file=str(tmp_path / "agg.pkl"))
+    clusters = model.fit(logs)
+    assert len(clusters) == 1, "Every pair is above the threshold, so all clusters must be merged"
+    (cluster,) = clusters.values()
+    assert sorted(cluster["indices"]) == list(range(len(logs)))
+    assert cluster["logs"][0].startswith(logs[cluster["indices"][0]])
+
+
+def test_union_find_groups():
+    union_find = UnionFind(6)
+    union_find.union(4, 1)
+    union_find.union(1, 3)
+    assert not union_find.union(3, 4)
+    assert union_find.groups() == [[0], [1, 3, 4], [2], [5]]
@@ -0,0 +1,53 @@
+import numpy as np
+from sklearn.datasets import make_blobs
+from sklearn.metrics import silhouette_score
+from utils.cluster_selection import (elbow_sweep, knee_is_settled, second_difference_knee, silhouette_sweep,
+                                     weighted_silhouette)
+
+
+def test_silhouette_sweep_finds_blobs():
+    X, _ = make_blobs(n_samples=600, centers=4, random_state=0)
+    best_k, scores, centers = silhouette_sweep(X, range(2, 8), sample_size=200)
+    assert best_k == 4
+    assert sorted(scores) == list(range(2, 8))
+    assert centers.shape == (4, 2)
+
+
+def test_silhouette_sweep_parallel_matches_serial():
+    X, _ = make_blobs(n_samples=300, centers=3, random_state=1)
+    serial = silhouette_sweep(X, range(2, 6), sample_size=100, minibatch=True)
+    parallel = silhouette_sweep(X, range(2, 6), sample_size=100, minibatch=True, workers=2)
+    assert serial[0] == parallel[0] and serial[1] == parallel[1]
+    assert np.allclose(serial[2], parallel[2])
+
+
+def test_weighted_silhouette_counts_occurrences():
+    X = np.array([[0.0], [1.0], [10.0], [11.0], [30.0]])
+    labels = np.array([0, 0, 1, 1, 1])
+    weights = np.array([5, 1, 1, 1, 20])
+    expected = silhouette_score(np.repeat(X, weights, axis=0), np.repeat(labels, weights))
+    assert np.isclose(weighted_silhouette(X, labels, weights), expected)
+    assert not np.isclose(weighted_silhouette(X, labels), expected), "Weights were ignored"
+    sampled = weighted_silhouette(X, labels, weights * 1000, sample_size=2000)
+    assert abs(sampled - expected) < 0.05, "Sample was not drawn in proportion to the weights"
+
+
+def test_elbow_sweep_stops_once_knee_is_settled():
+    rows = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]] * 20
+    wcss = elbow_sweep(np.array(rows), 10, n_init=3)
+    assert len(wcss) < 10, "Sweep did not stop once the knee was settled"
+    assert wcss[2] < 1e-9 < wcss[1] < wcss[0]
+    full = wcss + [0.0] * (10 - len(wcss))
+    assert second_difference_knee(wcss) == second_difference_knee(full) == 3
+    assert not knee_is_settled(wcss[:4]) and knee_is_settled(wcss)
+
+
+def test_elbow_sweep_fits_k_values_in_parallel():
+    X, _ = make_blobs(n_samples=200, n_features=5, centers=4, random_state=2)
+    X = np.abs(X)
+    serial = elbow_sweep(X, 6, n_init=4)
+    parallel = elbow_sweep(X, 6, n_init=4, workers=2)
+    assert parallel == elbow_sweep(X, 6, n_init=4, workers=2), "Parallel sweep is not deterministic"
+    assert len(serial) == len(parallel) == 6
+    assert np.allclose(serial, parallel, rtol=0.05)
+    assert all(later <= earlier + 1e-9 for earlier, later in zip(serial, serial[1:])), "Warm starts raised the inertia"
@@ -0,0 +1,19 @@
+from algo.COSINE_KMEANS.classification import LogClassifier
+
+
+def test_most_common_log_weights_timestamped_lines():
+    classifier = LogClassifier()
+    plain = "service restarted"
+    stamped = "12:30:45 disk check"
+    # The timestamped line weighs its distinct non-whitespace characters, the plain line counts 1 per occurrence
+    clusters = {0: [plain, plain, plain, stamped], 1: ["a", "b", "a", "b"]}
+    classification = classifier.classify(clusters[0] + clusters[1], clusters)
+    assert classification[0]["most_common_log"] == stamped
+    assert classification[1]["most_common_log"] == "a", "Ties must go to the line that appears first"
+    assert classification[1]["percentage_of_total_logs"] == 50.0
+
+
+def test_find_timestamps_uses_combined_pattern():
+    classifier = LogClassifier()
+    assert classifier._find_timestamps("2024-01-02T10:11:12 started") == ["2024-01-02T10:11:12"]
+    assert classifier._find_timestamps("no time here") is None
@@ -0,0 +1,38 @@
+import numpy as np
+from scipy import sparse
+from sklearn.cluster import DBSCAN
+from sklearn.metrics.pairwise import euclidean_distances
+from algo.DBSCAN.clustering import find_knee, k_distance_curve, radius_graph, threshold_graph
+
+
+def test_threshold_graph_matches_dense_distances():
+    rng = np.random.RandomState(0)
+    X = sparse.csr_matrix(rng.rand(60, 4))
+    graph = radius_graph(X, 0.8)
+    dense = euclidean_distances(X)
+    for eps in (0.2, 0.5, 0.8):
+        thresholded = threshold_graph(graph, eps)
+        assert thresholded.nnz == np.count_nonzero(dense <= eps)
+        expected = DBSCAN(eps=eps, min_samples=3, metric='precomputed').fit(dense).labels_
+        labels = DBSCAN(eps=eps, min_samples=3, metric='precomputed').fit(thresholded).labels_
+        assert (labels == expected).all()
+
+
+def test_k_distance_knee_separates_blobs_from_noise():
+    rng = np.random.RandomState(0)
+    blobs = np.vstack([rng.normal(center, 0.05, size=(50, 2)) for center in ([0, 0], [3, 3])])
+    noise = rng.uniform(-5, 8, size=(10, 2))
+    X = sparse.csr_matrix(np.vstack([blobs, noise]))
+
+    curve = k_distance_curve(X, 5)
+    assert len(curve) == 110 and (np.diff(curve) >= 0).all()
+    eps = curve[find_knee(curve)]
+    assert 0.05 < eps < 1.0
+    labels = DBSCAN(eps=eps, min_samples=5).fit(X).labels_
+    assert len(set(labels[:100])) == 2
+
+
+def test_k_distance_curve_counts_sample_weight():
+    X = sparse.csr_matrix([[0.0, 0.0], [1.0, 0.0], [5.0, 0.0]])
+    curve = k_distance_curve(X, 3, sample_weight=[3.0, 1.0, 1.0])
+    assert np.allclose(curve, [0.0, 1.0, 5.0])
@@ -0,0 +1,25 @@
+from algo.KMEANS.clustering import LogClusterKMeans
+from utils.dedup import deduplicate_logs, mask_log
+from utils.parser_log import parse_log
+
+
+def test_mask_log_replaces_variable_tokens():
+    log = "Jun 14 15:16:01 combo sshd(pam_unix)[19939]: uid=0 rhost=218.188.2.4 id=0x1F\n"
+    assert mask_log(log) == "<*> combo sshd(pam_unix)[<*>]: uid=<*> rhost=<*> id=<*>\n"
+
+
+def test_deduplicate_logs_counts_and_inverse():
+    logs = ["a 1", "b", "a 2", "b"]
+    documents, counts, inverse = deduplicate_logs(logs)
+    assert documents == ["a <*>", "b"]
+    assert counts.tolist() == [2, 2]
+    assert inverse.tolist() == [0, 1, 0, 1]
+
+
+def test_kmeans_labels_are_expanded_to_all_lines(tmp_path):
+    logs = parse_log("log.txt")
+    log_cluster = LogClusterKMeans(model_file=str(tmp_path / "model.pkl"))
+    clusters = log_cluster.fit(logs)
+
+    assert len(log_cluster.labels_) == len(logs), "Labels were not expanded back to all lines"
+    assert sum(len(cluster) for cluster in clusters.values()) == len(logs), "Lines were lost in clustering"
@@ -0,0 +1,39 @@
+import os
+from sklearn.feature_extraction.text import TfidfVectorizer
+from utils.feature_store import FeatureStore, dataset_key
+
+
+DOCUMENTS = ["disk space low on sda1", "connection from 10.0.0.1 closed", "disk space low on sdb2"]
+
+
+def test_feature_store_computes_dataset_once():
+    store = FeatureStore()
+    features = store.features(DOCUMENTS)
+    assert store.features(list(DOCUMENTS)) is features, "Same dataset was vectorized twice"
+    assert store.features(DOCUMENTS, ngram_range=(1, 2)) is not features, "Vectorizer params are not part of the key"
+
+    expected = TfidfVectorizer().fit_transform(DOCUMENTS)
+    assert abs(features.matrix - expected).max() < 1e-12, "Shared matrix differs from TfidfVectorizer output"
+
+
+def test_feature_store_disk_cache(tmp_path):
+    cache_dir = str(tmp_path / "features")
+    features = FeatureStore(cache_dir).features(DOCUMENTS)
+    assert len(os.listdir(cache_dir)) == 2, "Matrix and vectorizer were not persisted"
+
+    cached = FeatureStore(cache_dir).features(DOCUMENTS)
+    assert (cached.matrix != features.matrix).nnz == 0, "Cached matrix differs"
+    assert cached.vectorizer.vocabulary_ == features.vectorizer.vocabulary_, "Cached vectorizer differs"
+
+
+def test_feature_store_evicts_least_recently_used(tmp_path):
+    cache_dir = str(tmp_path / "features")
+    store = FeatureStore(cache_dir, max_entries=2)
+    for i in range(3):
+        store.features(DOCUMENTS[:i + 1])
+        for name in os.listdir(cache_dir):
+            if name.endswith(".npz"):
+                os.utime(os.path.join(cache_dir, name), (os.path.getmtime(os.path.join(cache_dir, name)) - 10,) * 2)
+    assert len(os.listdir(cache_dir)) == 4, "Cache holds more than max_entries datasets"
+    assert FeatureStore(cache_dir)._load(dataset_key(DOCUMENTS[:1], {})) is None, \
+        "The least recently used dataset was kept"
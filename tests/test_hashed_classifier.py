@@ -0,0 +1,49 @@
+from algo.DBSCAN.classification import LogClassifier as DBSCANLogClassifier
+from algo.KMEANS.classification import LogClassifier
+
+
+def test_classify_keeps_model_resident(tmp_path):
+    model_file = str(tmp_path / "classifier.pkl")
+    clusters = {0: ["ERROR disk failed", "ERROR disk failed again"], 1: ["INFO service started", "DEBUG cache hit"]}
+    classifier = LogClassifier(model_file=model_file)
+    classification = classifier.classify([], clusters)
+    assert classification[0] == ("ERROR", 1.0)
+    assert classification[1][0] in ("INFO", "DEBUG")
+
+    model = classifier.model
+    classifier.classify([], clusters)
+    assert classifier.model is model, "Model was refitted instead of updated"
+    assert model.class_count_.sum() == 8, "Second call did not update the model incrementally"
+
+
+def test_classify_many_matches_single_log(tmp_path):
+    model_file = str(tmp_path / "classifier.pkl")
+    DBSCANLogClassifier(model_file=model_file).classify([], {0: ["disk error occurred", "service started ok"]})
+
+    classifier = DBSCANLogClassifier(model_file=model_file)
+    results = classifier.classify_many(["disk error occurred", "service started ok"])
+    assert [category for category, _ in results] == ["ERROR", "INFO"]
+    assert results[0] == classifier.classify_single_log("disk error occurred")
+    assert all(0.0 < probability <= 1.0 for _, probability in results)
+
+
+def test_classify_after_memory_mapped_scoring(tmp_path):
+    model_file = str(tmp_path / "classifier.pkl")
+    clusters = {0: ["ERROR disk failed", "INFO service started"]}
+    LogClassifier(model_file=model_file).classify([], clusters)
+
+    classifier = LogClassifier(model_file=model_file)
+    classifier.classify_single_log("ERROR disk failed")
+    classifier.classify([], clusters)
+    assert classifier.model.class_count_.sum() == 4, "Memory-mapped model was not reloaded for training"
+
+
+def test_classifiers_reject_each_others_models(tmp_path):
+    assert LogClassifier().model_file != DBSCANLogClassifier().model_file
+    model_file = str(tmp_path / "classifier.pkl")
+    LogClassifier(model_file=model_file).classify([], {0: ["ERROR disk failed", "INFO service started"]})
+    try:
+        DBSCANLogClassifier(model_file=model_file).classify([], {0: ["disk error occurred"]})
+    except ValueError:
+        return
+    raise AssertionError("A model trained with other labeling rules was updated")
@@ -0,0 +1,48 @@
+import joblib
+from sklearn.cluster import KMeans
+from algo.KMEANS.clustering import LogClusterKMeans
+from utils.model_bundle import load_bundle
+from utils.parser_log import parse_log
+
+
+def test_partial_fit_updates_saved_model(tmp_path):
+    logs = parse_log("log.txt")
+    model_file = str(tmp_path / "kmeans.pkl")
+    model = LogClusterKMeans(model_file=model_file)
+    model.fit(logs[:1000])
+    n_clusters = model.kmeans.n_clusters
+
+    incremental = LogClusterKMeans(model_file=model_file)
+    clusters = incremental.partial_fit(logs[1000:])
+    assert sum(len(cluster) for cluster in clusters.values()) == 1000
+    assert incremental.kmeans.n_clusters == n_clusters, "Clusters were spawned without a threshold"
+    assert incremental.cluster_counts_.sum() == len(logs)
+
+    reloaded = LogClusterKMeans(model_file=model_file)
+    reloaded.load_model()
+    assert (reloaded.kmeans.cluster_centers_ == incremental.kmeans.cluster_centers_).all(), "Updated centroids were not saved"
+    assert (reloaded.cluster_counts_ == incremental.cluster_counts_).all()
+
+
+def test_partial_fit_spawns_clusters_above_threshold(tmp_path):
+    model_file = str(tmp_path / "kmeans.pkl")
+    model = LogClusterKMeans(model_file=model_file)
+    model.fit(["disk sda1 failed", "disk sdb2 failed", "user root logged in", "user admin logged in"])
+    n_clusters = model.kmeans.n_clusters
+
+    model.new_cluster_threshold = 0.6
+    model.partial_fit(["disk sda1 failed", "kernel panic unknown", "kernel panic unknown"])
+    assert model.kmeans.n_clusters == n_clusters + 1
+    assert model.labels_[0] < n_clusters
+    assert model.labels_[1] == model.labels_[2] == n_clusters, "Line unlike every cluster was not given a new cluster"
+
+
+def test_partial_fit_refits_legacy_model(tmp_path):
+    model_file = str(tmp_path / "cluster_model.pkl")
+    joblib.dump(KMeans(n_clusters=2, n_init=1).fit([[0.0], [1.0]]), model_file)
+    logs = ["disk sda1 failed", "disk sdb2 failed", "user root logged in", "user admin logged in"]
+
+    model = LogClusterKMeans(model_file=model_file)
+    clusters = model.partial_fit(logs)
+    assert sum(len(cluster) for cluster in clusters.values()) == len(logs)
+    assert load_bundle(model_file)["vectorizer"] is not None, "Legacy model was not replaced by a bundle"
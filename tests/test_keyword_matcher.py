@@ -0,0 +1,36 @@
+import re
+import pytest
+from utils.keyword_matcher import KeywordMatcher, get_keyword_matcher
+
+
+KEYWORDS = {"ERROR": ["fail", "error"], "INFO": ["started", "using"], "DEBUG": ["using", "trace"]}
+
+
+def test_categories_follow_priority_order():
+    matcher = KeywordMatcher(KEYWORDS, default="Unknown")
+    # "trace" appears first in the line, but ERROR has priority over DEBUG
+    assert matcher.match("trace shows the disk error") == "ERROR"
+    assert matcher.match("using cache") == "INFO"
+    assert matcher.match("nothing here") == "Unknown"
+    assert matcher.match("Disk FAIL") == "Unknown"
+
+
+def test_ignore_case_regex_and_batch():
+    matcher = KeywordMatcher([("Timing", [r"timed?\s*out"]), ("Other", ["a.b"])], ignore_case=True, regex=True)
+    lines = ["Request TIMED OUT", "axb", "Request TIMED OUT", "plain"]
+    assert matcher.categorize(lines) == ["Timing", "Other", "Timing", None]
+    assert KeywordMatcher({"X": ["a.b"]}).match("axb") is None, "Literal keywords must be escaped"
+
+
+def test_get_keyword_matcher_reuses_compiled_matcher():
+    assert get_keyword_matcher(KEYWORDS) is get_keyword_matcher(dict(KEYWORDS))
+    assert get_keyword_matcher(KEYWORDS) is not get_keyword_matcher(KEYWORDS, ignore_case=True)
+
+
+def test_regex_keywords_that_can_not_be_joined():
+    matcher = KeywordMatcher([("Disk", [r"(?P<dev>sd\w+) failed", r"(?P<dev>nvme\w+) failed"]),
+                              ("Auth", ["(?i)denied", "refused"])], regex=True)
+    assert matcher.any_pattern is None
+    assert matcher.categorize(["nvme0 failed", "Access DENIED", "refused", "ok"]) == ["Disk", "Auth", "Auth", None]
+    with pytest.raises(re.error, match="'disk\\(' of category 'Disk'"):
+        KeywordMatcher({"Disk": ["disk("]}, regex=True)
@@ -0,0 +1,35 @@
+import os
+from utils.parser_log import LogFollower
+
+
+def read_new_lines(follower):
+    return [line for _, batch in follower.poll() for line in batch]
+
+
+def test_follower_resumes_from_checkpoint(tmp_path):
+    log_file = tmp_path / "app.log"
+    checkpoint_file = str(tmp_path / "checkpoint.json")
+    log_file.write_bytes(b"first\nsecond\npartial")
+
+    assert read_new_lines(LogFollower(str(log_file), checkpoint_file)) == ["first\n", "second\n"]
+
+    with open(log_file, "ab") as file:
+        file.write(b" line\nthird\n")
+    assert read_new_lines(LogFollower(str(log_file), checkpoint_file)) == ["partial line\n", "third\n"]
+    assert read_new_lines(LogFollower(str(log_file), checkpoint_file)) == [], "Lines were processed twice"
+
+
+def test_follower_detects_rotation_and_truncation(tmp_path):
+    log_file = tmp_path / "app.log"
+    log_file.write_bytes(b"old line\n")
+    follower = LogFollower(str(log_file))
+    assert read_new_lines(follower) == ["old line\n"]
+
+    os.rename(log_file, tmp_path / "app.log.1")
+    log_file.write_bytes(b"new file\n")
+    assert read_new_lines(follower) == ["new file\n"], "Rotation was not detected"
+
+    log_file.write_bytes(b"")
+    assert read_new_lines(follower) == []
+    log_file.write_bytes(b"after truncate\n")
+    assert read_new_lines(follower) == ["after truncate\n"], "Truncation was not detected"
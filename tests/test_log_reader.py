@@ -0,0 +1,45 @@
+import gzip
+from utils.parser_log import LogReader, parse_log, remove_stopwords
+
+
+def test_log_reader_batches_and_offsets(tmp_path):
+    log_file = tmp_path / "app.log"
+    log_file.write_bytes(b"first line\nsecond line\r\nthird line\n")
+
+    reader = LogReader(str(log_file), batch_size=2)
+    batches = list(reader)
+
+    assert batches == [["first line\n", "second line\n"], ["third line\n"]], "Lines were not batched correctly"
+    assert reader.offset == log_file.stat().st_size, "Offset does not point to the end of the file"
+
+    resumed = LogReader(str(log_file), offset=len(b"first line\n"))
+    assert list(resumed) == [["second line\n", "third line\n"]], "Reading did not resume from the offset"
+
+
+def test_parse_log_reads_compressed_files(tmp_path):
+    log_file = tmp_path / "syslog.1.gz"
+    with gzip.open(log_file, "wb") as file:
+        file.write(b"This is a test log\nAnother test log\n")
+
+    logs = parse_log(str(log_file))
+    assert logs == ["This is a test log\n", "Another test log\n"], "Compressed log was not read"
+
+    cleaned_logs = remove_stopwords(LogReader(str(log_file)), ["this", "is", "a", "test"])
+    assert cleaned_logs == ["log", "Another log"], "Stopwords were not removed from the batch iterator"
+
+
+def test_log_reader_matches_text_mode(tmp_path):
+    log_file = tmp_path / "app.log"
+    log_file.write_bytes("first\r\nsecond\rthird\nfourth\x0cstill fourth\rlast\r".encode("utf-8"))
+    with open(log_file, "r", encoding="utf-8") as file:
+        expected = file.readlines()
+    assert parse_log(str(log_file)) == expected == ["first\n", "second\n", "third\n", "fourth\x0cstill fourth\n", "last\n"]
+
+    log_file.write_bytes(b"valid\n\xff invalid utf-8\n")
+    try:
+        parse_log(str(log_file))
+    except UnicodeDecodeError:
+        pass
+    else:
+        raise AssertionError("Invalid bytes were decoded silently")
+    assert list(LogReader(str(log_file), errors='replace')) == [["valid\n", "� invalid utf-8\n"]]
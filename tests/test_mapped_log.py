@@ -0,0 +1,33 @@
+import os
+from utils.mapped_log import MappedLog, group_labels, take_lines
+from utils.parser_log import parse_log
+
+
+def test_mapped_log_random_access(tmp_path):
+    log_file = tmp_path / "app.log"
+    log_file.write_bytes(b"first line\nsecond line\r\nthird line")
+
+    with MappedLog(str(log_file)) as logs:
+        assert len(logs) == 3, "Wrong number of lines in the index"
+        assert logs[1] == "second line\n", "Random access returned a wrong line"
+        assert logs[-1] == "third line", "Last line without newline was not indexed"
+        assert bytes(logs.slice_bytes(0, 2)) == b"first line\nsecond line\r\n", "Byte slice is wrong"
+        assert list(logs.take([2, 0])) == ["third line", "first line\n"], "Lazy view returned wrong lines"
+
+    assert os.path.exists(str(log_file) + ".idx.npy"), "Line-offset index was not persisted"
+    with MappedLog(str(log_file)) as reopened:
+        assert list(reopened) == ["first line\n", "second line\n", "third line"], "Persisted index is wrong"
+
+
+def test_mapped_log_matches_parse_log(tmp_path):
+    log_file = tmp_path / "log.txt"
+    log_file.write_bytes(open("log.txt", "rb").read())
+
+    with MappedLog(str(log_file)) as logs:
+        assert list(logs) == parse_log(str(log_file)), "Mapped lines differ from parsed lines"
+
+
+def test_group_labels_keeps_first_appearance_order():
+    logs = ["a", "b", "c", "d"]
+    clusters = {label: take_lines(logs, indices) for label, indices in group_labels([2, 0, 2, 1]).items()}
+    assert list(clusters.items()) == [(2, ["a", "c"]), (0, ["b"]), (1, ["d"])], "Clusters were not grouped correctly"
@@ -0,0 +1,63 @@
+import os
+import joblib
+import numpy as np
+import pytest
+from sklearn.cluster import KMeans
+from algo.KMEANS.clustering import LogClusterKMeans
+from algo.KMEANS.classification import LogClassifier
+from utils.model_bundle import BUNDLE_VERSION, load_bundle, save_bundle
+from utils.parser_log import parse_log
+
+
+def test_loaded_kmeans_predicts_without_refit(tmp_path):
+    logs = parse_log("log.txt")[:400]
+    model_file = str(tmp_path / "kmeans.pkl")
+    model = LogClusterKMeans(model_file=model_file)
+    model.fit(logs)
+
+    loaded = LogClusterKMeans(model_file=model_file)
+    loaded.load_model()
+    assert (loaded.predict(logs) == model.predict(logs)).all()
+    assert (loaded.predict(logs) == model.labels_).all()
+
+    bundle = load_bundle(model_file)
+    assert bundle["version"] == BUNDLE_VERSION
+    assert bundle["metadata"]["model"] == "LogClusterKMeans"
+    assert isinstance(bundle["estimator"].cluster_centers_, np.memmap), "Estimator arrays are not memory-mapped"
+
+
+def test_loaded_classifier_scores_single_log(tmp_path):
+    logs = ["ERROR disk failed", "INFO service started", "ERROR disk failed again", "INFO service ready"]
+    model_file = str(tmp_path / "classifier.pkl")
+    LogClassifier(model_file=model_file).train_classifier(logs, ["ERROR", "INFO", "ERROR", "INFO"])
+
+    loaded = LogClassifier(model_file=model_file)
+    category, probability = loaded.classify_single_log("ERROR disk failed")
+    assert category == "ERROR" and probability > 0.5
+
+
+def test_load_bundle_wraps_bare_estimator(tmp_path):
+    model_file = str(tmp_path / "legacy.pkl")
+    joblib.dump(KMeans(n_clusters=2, n_init=1).fit([[0.0], [1.0]]), model_file)
+    bundle = load_bundle(model_file)
+    assert bundle["version"] == 0 and bundle["vectorizer"] is None
+    assert isinstance(bundle["estimator"], KMeans)
+
+
+
+def test_load_model_rejects_legacy_model(tmp_path):
+    model_file = str(tmp_path / "cluster_model.pkl")
+    joblib.dump(KMeans(n_clusters=2, n_init=1).fit([[0.0], [1.0]]), model_file)
+    with pytest.raises(ValueError, match="legacy model"):
+        LogClusterKMeans(model_file=model_file).load_model()
+
+def test_saving_keeps_memory_mapped_bundles_readable(tmp_path):
+    model_file = str(tmp_path / "model.pkl")
+    save_bundle(model_file, KMeans(n_clusters=2, n_init=1).fit(np.arange(20.0).reshape(10, 2)))
+    centers = load_bundle(model_file)["estimator"].cluster_centers_
+    expected = np.array(centers)
+
+    save_bundle(model_file, KMeans(n_clusters=3, n_init=1).fit(np.arange(40.0).reshape(20, 2)))
+    assert (centers == expected).all(), "Memory-mapped arrays changed when the bundle was rewritten"
+    assert load_bundle(model_file)["estimator"].n_clusters == 3
+    assert os.listdir(tmp_path) == ["model.pkl"], "Temporary file was left behind"
@@ -0,0 +1,19 @@
+from datetime import datetime
+from utils.parser_log import normalize_log, normalize_batch
+
+
+def test_normalize_log_formats():
+    year = datetime.now().year
+    assert normalize_log("Jun 14 15:16:01 combo sshd: check pass\n") == f"{year}-06-14 15:16:01, combo sshd: check pass"
+    assert normalize_log("2024-05-21 10:00:00,INFO started") == "2024-05-21 10:00:00, INFO started"
+    assert normalize_log("2016-09-28 04:30:30, Info") == "2016-09-28 04:30:30, Info"
+
+
+def test_normalize_log_keeps_invalid_timestamps():
+    for log in ["Feb 29 10:00:00 leap day", "Jun 14 24:00:00 late", "2015-02-29 10:00:00, Info", "no timestamp"]:
+        assert normalize_log(log) == log, f"Invalid timestamp was normalized: {log}"
+
+
+def test_normalize_batch_matches_normalize_log():
+    logs = ["Jun 14 15:16:01 a", "2024-05-21 10:00:00, b", "plain line"]
+    assert normalize_batch(logs) == [normalize_log(log) for log in logs], "Batch and single normalization differ"
@@ -0,0 +1,19 @@
+from utils.parser_log import parse_and_normalize_logs, shard_log_file
+
+
+def test_shards_are_aligned_on_lines(tmp_path):
+    log_file = tmp_path / "app.log"
+    log_file.write_bytes(b"aaaa\nbb\ncccccc\nd\n")
+
+    shards = shard_log_file(str(log_file), 3)
+    data = log_file.read_bytes()
+    assert shards[0][0] == 0 and shards[-1][1] == len(data), "Shards do not cover the whole file"
+    for start, end in shards:
+        assert start == 0 or data[start - 1:start] == b"\n", "Shard does not start at a line boundary"
+
+
+def test_parallel_normalize_matches_sequential():
+    stopwords = ["combo", "sshd(pam_unix)"]
+    sequential = parse_and_normalize_logs("log.txt", stopwords)
+    parallel = parse_and_normalize_logs("log.txt", stopwords, workers=4)
+    assert parallel == sequential, "Parallel normalization changed the result or the order of lines"
@@ -0,0 +1,94 @@
+import os
+from utils import parse_cache
+from utils.parse_cache import ParseCache, cached_parse
+from utils.parser_log import normalize_batch, parse_log
+from utils.proccess_log_file import preprocess_logs
+
+
+def test_cached_parse_round_trip(tmp_path):
+    log_file = tmp_path / "log.txt"
+    log_file.write_bytes(open("log.txt", "rb").read())
+    cache_dir = str(tmp_path / "cache")
+
+    columns = cached_parse(str(log_file), cache_dir, tokenizer="regex", stopword_source="sklearn")
+    logs = parse_log(str(log_file))
+    assert list(columns["raw"]) == logs, "Raw column differs from parsed lines"
+    assert list(columns["normalized"]) == normalize_batch(logs), "Normalized column differs"
+    assert list(columns["tokens"]) == preprocess_logs(logs, "regex", "sklearn"), "Tokens column differs"
+    assert len(os.listdir(cache_dir)) == 1, "Cache entry was not stored"
+
+
+def test_parse_cache_misses_after_file_change(tmp_path):
+    log_file = tmp_path / "app.log"
+    log_file.write_bytes("first line\nвторая строка\n".encode("utf-8"))
+    cache = ParseCache(str(tmp_path / "cache"))
+
+    assert cache.load(str(log_file)) is None
+    cache.store(str(log_file), {"raw": parse_log(str(log_file))})
+    assert list(cache.load(str(log_file))["raw"]) == ["first line\n", "вторая строка\n"]
+
+    log_file.write_bytes(b"changed\n")
+    assert cache.load(str(log_file)) is None, "Stale cache entry was returned for a changed file"
+    cache.store(str(log_file), {"raw": ["changed\n"]})
+    assert os.listdir(cache.cache_dir) == [os.path.basename(cache.entry_dir(str(log_file)))], \
+        "The previous entry of the same path was not replaced"
+
+
+def test_unchanged_file_is_not_rehashed(tmp_path, monkeypatch):
+    log_file = tmp_path / "app.log"
+    log_file.write_bytes(b"line\n")
+    cache_dir = str(tmp_path / "cache")
+    cached_parse(str(log_file), cache_dir, tokens=False)
+
+    def fail(log_file):
+        raise AssertionError("Contents were hashed although size and mtime are unchanged")
+    monkeypatch.setattr(parse_cache, "content_hash", fail)
+    assert list(cached_parse(str(log_file), cache_dir, tokens=False)["raw"]) == ["line\n"]
+
+
+def test_tokens_are_cached_per_preprocessing(tmp_path):
+    log_file = tmp_path / "app.log"
+    log_file.write_bytes(b"The (connection) was closed\n")
+    cache = ParseCache(str(tmp_path / "cache"))
+
+    assert "tokens" not in cached_parse(str(log_file), cache.cache_dir, tokens=False)
+    tokens = cached_parse(str(log_file), cache.cache_dir, tokenizer="regex", stopword_source="sklearn")["tokens"]
+    assert list(tokens) == ["connection closed"]
+    assert set(cache.load(str(log_file))) == {"raw", "normalized", "tokens.regex.sklearn"}
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"), max_entries=2)
+    log_files = []
+    for i in range(3):
+        log_file = tmp_path / f"app{i}.log"
+        log_file.write_bytes(b"line\n")
+        log_files.append(str(log_file))
+        cache.store(str(log_file), {"raw": ["line\n"]})
+        os.utime(os.path.join(cache.entry_dir(str(log_file)), "meta.json"), (i, i))
+    (tmp_path / "app0.log").write_bytes(b"changed\n")
+    cache.store(log_files[0], {"raw": ["changed\n"]})
+
+    assert cache.load(log_files[1]) is None, "The least recently used entry was kept"
+    assert cache.load(log_files[2]) is not None
+
+
+def test_cache_hit_does_not_rewrite_meta(tmp_path, monkeypatch):
+    log_file = tmp_path / "app.log"
+    log_file.write_bytes(b"line\n")
+    cache = ParseCache(str(tmp_path / "cache"))
+    cache.store(str(log_file), {"raw": ["line\n"]})
+    meta_file = os.path.join(cache.entry_dir(str(log_file)), "meta.json")
+    os.utime(meta_file, (0, 0))
+    inode = os.stat(meta_file).st_ino
+
+    assert list(cache.load(str(log_file))["raw"]) == ["line\n"]
+    assert os.stat(meta_file).st_ino == inode, "meta.json was rewritten on a cache hit"
+    assert os.path.getmtime(meta_file) > 0, "Last-use time was not refreshed"
+
+    def read_only(*args, **kwargs):
+        raise PermissionError("read-only file system")
+
+    # A read-only cache still serves hits
+    monkeypatch.setattr(os, "utime", read_only)
+    assert list(cache.load(str(log_file))["raw"]) == ["line\n"], "Read-only cache entry was not served"
@@ -0,0 +1,21 @@
+from utils.proccess_log_file import preprocess_logs
+
+
+def test_preprocess_logs_regex_tokenizer():
+    logs = ["Jun 14 15:16:02 combo sshd(pam_unix)[19937]: check pass; user unknown\n"]
+    assert preprocess_logs(logs, tokenizer="regex", stopword_source="sklearn") == \
+        ["jun 14 15:16:02 combo sshd pam_unix 19937 check pass user unknown"]
+
+
+def test_preprocess_logs_removes_english_stopwords():
+    assert preprocess_logs(["The connection was closed by the host"], tokenizer="regex", stopword_source="sklearn") == \
+        ["connection closed host"]
+
+
+def test_preprocess_logs_rejects_unknown_modes():
+    for kwargs in ({"tokenizer": "spacy"}, {"tokenizer": "regex", "stopword_source": "spacy"}):
+        try:
+            preprocess_logs(["line"], **kwargs)
+        except ValueError:
+            continue
+        raise AssertionError(f"{kwargs} was accepted")
@@ -0,0 +1,29 @@
+import numpy as np
+from scipy import sparse
+from utils.spherical_kmeans import SphericalKMeans
+
+
+def test_spherical_kmeans_groups_by_direction():
+    # Two directions with very different norms: cosine clustering must ignore the norm
+    X = sparse.csr_matrix([[1.0, 0.1, 0.0], [10.0, 0.0, 0.5], [0.0, 1.0, 0.1], [0.2, 20.0, 0.0], [5.0, 0.3, 0.0]])
+    model = SphericalKMeans(n_clusters=2, random_state=0).fit(X)
+    labels = model.labels_
+    assert labels[0] == labels[1] == labels[4] and labels[2] == labels[3] and labels[0] != labels[2]
+    assert np.allclose(np.linalg.norm(model.cluster_centers_, axis=1), 1.0)
+    assert (model.predict(X) == labels).all()
+
+
+def test_spherical_kmeans_sample_weight_and_inertia():
+    X = sparse.csr_matrix([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]])
+    one = SphericalKMeans(n_clusters=1, random_state=0).fit(X, sample_weight=[1.0, 1.0, 2.0])
+    assert np.allclose(one.cluster_centers_, [[np.sqrt(0.5), np.sqrt(0.5)]])
+    three = SphericalKMeans(n_clusters=3, random_state=0).fit(X)
+    assert three.inertia_ < 1e-12 < one.inertia_
+
+
+def test_spherical_kmeans_never_seeds_zero_rows():
+    # Rows without known terms come first; the duplicated initial centroid leaves a cluster empty
+    X = sparse.csr_matrix(np.vstack([np.zeros((6, 3))] + [np.eye(3)] * 2))
+    model = SphericalKMeans(n_clusters=3).fit(X, init=[[1.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+    assert np.allclose(np.linalg.norm(model.cluster_centers_, axis=1), 1.0), "Empty cluster got an all-zero centroid"
+    assert len(set(model.labels_[6:])) == 3
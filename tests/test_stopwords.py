@@ -0,0 +1,20 @@
+from utils.parser_log import remove_stopwords
+from utils.stopwords import StopwordFilter, get_stopwords, load_stopwords
+
+
+def test_bundled_stopwords_are_loaded_once():
+    stopwords = load_stopwords()
+    assert "the" in stopwords and "symptomsd" in stopwords, "Bundled stopwords/words.txt was not loaded"
+    assert load_stopwords() is stopwords, "Bundled stopwords were loaded twice"
+    assert get_stopwords(["Custom"], bundled=True) == stopwords | {"custom"}, "User stopwords were not merged"
+    assert get_stopwords(["Custom"]) == {"custom"}, "Bundled stopwords must be opt-in"
+
+
+def test_stopword_filter_is_case_insensitive():
+    stopword_filter = StopwordFilter(["is", "a"])
+    assert stopword_filter.clean_batch(["This IS  a\ttest", "nothing"]) == ["This test", "nothing"]
+
+
+def test_remove_stopwords_keeps_all_words_by_default():
+    assert remove_stopwords(["The  connection failed"]) == ["The connection failed"]
+    assert remove_stopwords(["The symptomsd zzqx"], get_stopwords(bundled=True)) == ["zzqx"]
@@ -0,0 +1,41 @@
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from algo.KMEANS.clustering import StreamingLogClusterKMeans
+from utils.hashed_features import StreamingTfidf
+from utils.parser_log import LogReader, parse_log
+
+
+def test_streaming_tfidf_matches_tfidf_vectorizer():
+    logs = parse_log("log.txt")[:300]
+    featurizer = StreamingTfidf()
+    for start in range(0, len(logs), 70):
+        featurizer.partial_fit(logs[start:start + 70])
+    X = featurizer.transform(logs)
+    expected = TfidfVectorizer().fit_transform(logs)
+    # Hash buckets are a permutation of the vocabulary, so compare pairwise similarities
+    assert np.allclose((X @ X.T).toarray(), (expected @ expected.T).toarray())
+
+
+def test_streaming_kmeans_labels_every_line(tmp_path):
+    model = StreamingLogClusterKMeans(n_clusters=4, batch_size=256, model_file=str(tmp_path / "model.pkl"),
+                                      random_state=0)
+    model.fit(LogReader("log.txt", batch_size=100))
+    labels = np.concatenate([labels for _, labels in model.iter_clusters(LogReader("log.txt"))])
+    assert len(labels) == len(parse_log("log.txt"))
+    assert set(labels) <= set(range(4))
+
+    loaded = StreamingLogClusterKMeans(model_file=str(tmp_path / "model.pkl"))
+    loaded.load_model()
+    assert (loaded.predict(parse_log("log.txt")) == labels).all(), "Loaded model predicts differently"
+
+
+def test_streaming_kmeans_keeps_learning_after_load(tmp_path):
+    logs = parse_log("log.txt")
+    model = StreamingLogClusterKMeans(n_clusters=4, model_file=str(tmp_path / "model.pkl"), random_state=0)
+    model.fit(logs[:500])
+
+    for mmap_mode in (None, 'r'):
+        loaded = StreamingLogClusterKMeans(model_file=str(tmp_path / "model.pkl"))
+        loaded.load_model(mmap_mode=mmap_mode)
+        loaded.partial_fit(logs[500:1000])
+        assert loaded.featurizer.n_documents > model.featurizer.n_documents
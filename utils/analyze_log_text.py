@@ -1,6 +1,29 @@
+from utils.keyword_matcher import get_keyword_matcher
+
+
 def analyze_log_text(log_text, keyword_dict):
-    for status, keywords in keyword_dict.items():
-        for keyword in keywords:
-            if re.search(keyword, log_text, re.IGNORECASE):
-                return status
-    return "Other"
\ No newline at end of file
+    """
+    Determines the category of a log line by the regular expressions of a keyword dictionary (case-insensitive).
+
+    Args:
+    - log_text (str): Log line.
+    - keyword_dict (dict): Category -> list of keyword patterns, in priority order.
+
+    Returns:
+    - str: Category of the first matching pattern, or "Other".
+    """
+    return get_keyword_matcher(keyword_dict, ignore_case=True, regex=True, default="Other").match(log_text)
+
+
+def categorize_logs(logs, keyword_dict):
+    """
+    Determines the categories of a batch of log lines, see analyze_log_text.
+
+    Args:
+    - logs (list): Log lines.
+    - keyword_dict (dict): Category -> list of keyword patterns, in priority order.
+
+    Returns:
+    - list: Category of every line.
+    """
+    return get_keyword_matcher(keyword_dict, ignore_case=True, regex=True, default="Other").categorize(logs)
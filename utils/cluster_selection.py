@@ -0,0 +1,199 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import numpy as np
+from scipy import sparse
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import normalize
+from utils.spherical_kmeans import SphericalKMeans, nonzero_rows
+
+
+def weighted_silhouette(X, labels, sample_weight=None, sample_size=10000, random_state=0):
+    """
+    Computes the silhouette of the rows of X as if every row occurred sample_weight times.
+
+    Rows weighted by occurrence counts (deduplicated templates) are expanded exactly when the expanded
+    set has at most sample_size rows; otherwise sample_size rows are drawn with replacement in proportion
+    to the weights, so a template seen 1000 times counts 1000 times more than one seen once.
+
+    Args:
+    - X (array or sparse matrix): Feature matrix.
+    - labels (ndarray): Cluster label of every row.
+    - sample_weight (ndarray): Weight of every row. Default is None (all rows count once).
+    - sample_size (int): Maximum number of (expanded) rows scored; None scores all rows. Default is 10000.
+    - random_state (int): Seed of the sample. Default is 0.
+
+    Returns:
+    - float: Silhouette score, or -1.0 if it is undefined (fewer than two clusters in the scored rows).
+    """
+    weights = np.ones(X.shape[0]) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+    total = weights.sum()
+    if np.array_equal(weights, np.round(weights)) and (sample_size is None or total <= sample_size):
+        rows = np.repeat(np.arange(X.shape[0]), weights.astype(np.int64))
+    elif sample_weight is None:
+        rows = np.random.RandomState(random_state).choice(X.shape[0], sample_size, replace=False)
+    else:
+        rows = np.random.RandomState(random_state).choice(X.shape[0], sample_size or X.shape[0], p=weights / total)
+    labels = np.asarray(labels)[rows]
+    if not 2 <= len(np.unique(labels)) < len(rows):
+        # Silhouette is undefined for a single cluster
+        return -1.0
+    return float(silhouette_score(X[rows], labels))
+
+
+def _fit_candidate(X, n_clusters, sample_weight, minibatch, sample_size, random_state):
+    if minibatch:
+        model = MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state)
+    else:
+        model = KMeans(n_clusters=n_clusters, random_state=random_state)
+    model.fit(X, sample_weight=sample_weight)
+    score = weighted_silhouette(X, model.labels_, sample_weight, sample_size, random_state)
+    return n_clusters, score, model.cluster_centers_
+
+
+def silhouette_sweep(X, k_values, sample_weight=None, sample_size=10000, minibatch=False, workers=1, random_state=0):
+    """
+    Fits one model per candidate number of clusters and scores it with a sampled silhouette.
+
+    Candidates are fitted in a process pool when workers > 1. The silhouette is computed on at most
+    sample_size rows drawn with a fixed seed in proportion to sample_weight (see weighted_silhouette),
+    so the sweep is O(n * sample_size) instead of O(n^2) and follows the occurrence counts of the rows.
+
+    Args:
+    - X (array or sparse matrix): Feature matrix.
+    - k_values (iterable): Candidate numbers of clusters (each >= 2 and < number of rows).
+    - sample_weight (ndarray): Weight of every row. Default is None.
+    - sample_size (int): Rows used for the silhouette; None uses all rows. Default is 10000.
+    - minibatch (bool): Fit the candidates with MiniBatchKMeans instead of KMeans. Default is False.
+    - workers (int): Number of processes (None - one per CPU, 1 - no parallelism). Default is 1.
+    - random_state (int): Seed of the models and the silhouette sample. Default is 0.
+
+    Returns:
+    - tuple: A tuple containing three elements:
+             1. Best number of clusters.
+             2. Dictionary of silhouette score per number of clusters.
+             3. Cluster centers of the best candidate, usable as init of the final fit.
+    """
+    k_values = list(k_values)
+    workers = min(workers or os.cpu_count() or 1, len(k_values))
+    arguments = (repeat(X), k_values, repeat(sample_weight), repeat(minibatch), repeat(sample_size),
+                 repeat(random_state))
+    if workers <= 1:
+        results = list(map(_fit_candidate, *arguments))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_fit_candidate, *arguments))
+    scores = {n_clusters: score for n_clusters, score, _ in results}
+    # Ties go to the smallest k, like list.index(max(scores))
+    best_k, _, best_centers = max(results, key=lambda result: (result[1], -result[0]))
+    return best_k, scores, best_centers
+
+
+def second_difference_knee(wcss):
+    """
+    Picks the number of clusters from an inertia curve by its second differences.
+
+    Args:
+    - wcss (list): Inertia for k = 1, 2, ...
+
+    Returns:
+    - int: Number of clusters (the length of the curve when it has fewer than three points).
+    """
+    if len(wcss) < 3:
+        # The second difference needs at least three points
+        return len(wcss)
+    return int(np.argmin(np.diff(wcss, 2))) + 1
+
+
+def knee_is_settled(wcss, tol=1e-3):
+    """
+    Tells whether larger k values can no longer change second_difference_knee(wcss).
+
+    Inertia does not increase with k, so every later second difference is at least
+    min(wcss[-2] - 2 * wcss[-1], -2 * wcss[-1]). Once the smallest second difference so far is at or
+    below that bound (up to tol * wcss[0]), the knee is unambiguous.
+
+    Args:
+    - wcss (list): Inertia for k = 1, 2, ...
+    - tol (float): Tolerance relative to the inertia at k = 1. Default is 1e-3.
+
+    Returns:
+    - bool: True if the sweep can stop.
+    """
+    if len(wcss) < 3:
+        return False
+    bound = min(wcss[-2] - 2 * wcss[-1], -2 * wcss[-1])
+    return np.diff(wcss, 2).min() <= bound + tol * wcss[0]
+
+
+def _grow_centers(X, seed_weights, centers, n_clusters, random_state):
+    # k-means++ seeding of the missing centroids; rows with zero seed weight (all-zero rows) are never picked
+    if centers is None:
+        first = random_state.choice(X.shape[0], p=seed_weights / seed_weights.sum())
+        centers = X[first].toarray()
+    while len(centers) < n_clusters:
+        distances = np.clip(1.0 - np.asarray(X @ centers.T).max(axis=1), 0.0, None) * seed_weights
+        probabilities = distances if distances.sum() > 0 else seed_weights
+        new_seed = random_state.choice(X.shape[0], p=probabilities / probabilities.sum())
+        centers = np.vstack([centers, X[new_seed].toarray()])
+    return centers
+
+
+def _fit_k(X, weights, seed_weights, n_clusters, base_centers, n_init, seed):
+    # n_init restarts of one k, each starting from the base solution plus its own new seeds
+    random_state = np.random.RandomState(seed)
+    best = None
+    for _ in range(n_init):
+        init = _grow_centers(X, seed_weights, base_centers, n_clusters, random_state)
+        model = SphericalKMeans(n_clusters=n_clusters, random_state=random_state).fit(X, weights, init=init)
+        if best is None or model.inertia_ < best.inertia_:
+            best = model
+    return best.inertia_, best.cluster_centers_
+
+
+def elbow_sweep(X, max_clusters, sample_weight=None, n_init=10, workers=1, random_state=0, tol=1e-3):
+    """
+    Computes the spherical k-means inertia curve for k = 1..max_clusters with warm starts.
+
+    k values are fitted in waves of `workers` concurrent processes. Every k of a wave starts from the
+    best centroids of the previous wave plus new k-means++ seeds, so with one worker the k + 1 fit
+    starts from the k solution plus one seed. The sweep stops as soon as knee_is_settled, i.e. once
+    larger k can no longer change second_difference_knee of the curve.
+
+    Args:
+    - X (sparse matrix): Feature matrix.
+    - max_clusters (int): Largest number of clusters.
+    - sample_weight (ndarray): Weight of every row. Default is None.
+    - n_init (int): Number of restarts of every k. Default is 10.
+    - workers (int): Number of processes (None - one per CPU, 1 - no parallelism). Default is 1.
+    - random_state (int): Seed of the sweep. Default is 0.
+    - tol (float): Inertia tolerance of the stopping rule, relative to the inertia at k = 1. Default is 1e-3.
+
+    Returns:
+    - list: Inertia for k = 1, 2, ... (may be shorter than max_clusters after an early stop).
+    """
+    X = normalize(sparse.csr_matrix(X, dtype=np.float64))
+    weights = np.ones(X.shape[0]) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+    seed_weights = weights * nonzero_rows(X)
+    max_clusters = min(max_clusters, int(np.count_nonzero(seed_weights)))
+    if max_clusters == 0:
+        # Only all-zero rows: every centroid is equally (dis)similar
+        return [float(weights.sum())]
+    seeds = np.random.RandomState(random_state).randint(np.iinfo(np.int32).max, size=max_clusters)
+    workers = min(workers or os.cpu_count() or 1, max_clusters)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    wcss = []
+    centers = None
+    try:
+        while len(wcss) < max_clusters and not knee_is_settled(wcss, tol):
+            k_values = range(len(wcss) + 1, min(len(wcss) + workers, max_clusters) + 1)
+            arguments = (repeat(X), repeat(weights), repeat(seed_weights), k_values, repeat(centers), repeat(n_init),
+                         seeds[k_values.start - 1:k_values.stop - 1])
+            results = list((executor.map if executor else map)(_fit_k, *arguments))
+            wcss.extend(inertia for inertia, _ in results)
+            centers = results[-1][1]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return wcss
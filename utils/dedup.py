@@ -0,0 +1,51 @@
+import re
+import numpy as np
+
+
+# Variable parts of log lines replaced by "<*>" before deduplication, applied in order
+MASK_RULES = [
+    (re.compile(r'^(?:\w{3}\s+\d{1,2}\s+\d{1,2}:\d{2}:\d{2}|\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?)'), '<*>'),
+    (re.compile(r'\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b'), '<*>'),
+    (re.compile(r'\b0x[0-9a-fA-F]+\b'), '<*>'),
+    (re.compile(r'\b(?=[0-9a-fA-F]*\d)(?=[0-9a-fA-F]*[a-fA-F])[0-9a-fA-F]{8,}\b'), '<*>'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '<*>'),
+]
+
+
+def mask_log(log, mask_rules=MASK_RULES):
+    """
+    Replaces variable tokens (timestamps, IP addresses, hex values, numbers) of a log line with "<*>".
+
+    Args:
+    - log (str): Log line.
+    - mask_rules (list): Pairs of compiled pattern and replacement. Default is MASK_RULES.
+
+    Returns:
+    - str: Masked log line.
+    """
+    for pattern, replacement in mask_rules:
+        log = pattern.sub(replacement, log)
+    return log
+
+
+def deduplicate_logs(logs, mask_rules=MASK_RULES):
+    """
+    Collapses log lines that are identical after masking into unique rows with occurrence counts.
+
+    Args:
+    - logs (list): List of log lines.
+    - mask_rules (list): Masking rules; None deduplicates exact lines only. Default is MASK_RULES.
+
+    Returns:
+    - tuple: A tuple containing three elements:
+             1. List of unique (masked) log lines.
+             2. Array of occurrence counts of every unique line, usable as sample_weight.
+             3. Array mapping every input line to its unique row, to expand labels back (labels[inverse]).
+    """
+    index = {}
+    inverse = np.empty(len(logs), dtype=np.int64)
+    for i, log in enumerate(logs):
+        document = mask_log(log, mask_rules) if mask_rules else log
+        inverse[i] = index.setdefault(document, len(index))
+    counts = np.bincount(inverse, minlength=len(index)).astype(np.float64)
+    return list(index), counts, inverse
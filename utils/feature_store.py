@@ -0,0 +1,114 @@
+import hashlib
+import os
+import joblib
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+
+class FeatureSet:
+    """Fitted TF-IDF vectorizer together with the CSR matrix of the dataset it was fitted on."""
+    def __init__(self, matrix, vectorizer):
+        self.matrix = matrix
+        self.vectorizer = vectorizer
+
+
+def dataset_key(documents, vectorizer_params):
+    """
+    Computes the key of a dataset for the given vectorizer parameters.
+
+    Args:
+    - documents (iterable): Documents of the dataset.
+    - vectorizer_params (dict): TfidfVectorizer parameters.
+
+    Returns:
+    - str: Hex digest over the documents (in order) and the parameters.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(sorted(vectorizer_params.items())).encode('utf-8'))
+    for document in documents:
+        digest.update(document.encode('utf-8'))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+MAX_ENTRIES = 16
+
+
+class FeatureStore:
+    """
+    Cache of fitted TF-IDF features keyed by the documents and the vectorizer parameters.
+
+    Every consumer vectorizes its own documents (masked templates, preprocessed tokens, ...), so the
+    store does not share one matrix between consumers; it avoids refitting the same dataset. Feature sets
+    are kept in memory by dataset key and, when cache_dir is set, persisted as <key>.npz (scipy sparse
+    matrix) and <key>.vectorizer.pkl so a rerun on the same data skips vectorization. The least recently
+    used files beyond max_entries datasets are evicted.
+    """
+    def __init__(self, cache_dir=None, max_entries=MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._feature_sets = {}
+
+
+    def features(self, documents, **vectorizer_params):
+        """
+        Returns the TF-IDF features of a dataset, computing them only when they are not cached.
+
+        Args:
+        - documents (list): Documents of the dataset.
+        - **vectorizer_params: TfidfVectorizer parameters.
+
+        Returns:
+        - FeatureSet: Matrix and fitted vectorizer of the dataset.
+        """
+        key = dataset_key(documents, vectorizer_params)
+        feature_set = self._feature_sets.get(key)
+        if feature_set is None:
+            feature_set = self._load(key)
+            if feature_set is None:
+                vectorizer = TfidfVectorizer(**vectorizer_params)
+                feature_set = FeatureSet(vectorizer.fit_transform(documents).tocsr(), vectorizer)
+                self._save(key, feature_set)
+            self._feature_sets[key] = feature_set
+        return feature_set
+
+
+    def _load(self, key):
+        if self.cache_dir is None:
+            return None
+        path = os.path.join(self.cache_dir, key)
+        try:
+            feature_set = FeatureSet(sparse.load_npz(path + ".npz").tocsr(), joblib.load(path + ".vectorizer.pkl"))
+            # The matrix mtime is the last-use time of the entry
+            os.utime(path + ".npz")
+            return feature_set
+        except (OSError, ValueError, EOFError):
+            return None
+
+
+    def _save(self, key, feature_set):
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, key)
+        joblib.dump(feature_set.vectorizer, path + ".vectorizer.pkl.tmp")
+        sparse.save_npz(path + ".tmp.npz", feature_set.matrix)
+        os.replace(path + ".vectorizer.pkl.tmp", path + ".vectorizer.pkl")
+        os.replace(path + ".tmp.npz", path + ".npz")
+        self._evict()
+
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npz") and not name.endswith(".tmp.npz"):
+                try:
+                    entries.append((os.path.getmtime(os.path.join(self.cache_dir, name)), name[:-len(".npz")]))
+                except OSError:
+                    continue
+        for _, key in sorted(entries)[:max(len(entries) - self.max_entries, 0)]:
+            for suffix in (".npz", ".vectorizer.pkl"):
+                try:
+                    os.remove(os.path.join(self.cache_dir, key + suffix))
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,176 @@
+from collections import Counter
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.naive_bayes import MultinomialNB
+from utils.model_bundle import load_bundle, save_bundle
+
+
+CATEGORIES = ["ERROR", "INFO", "DEBUG", "WARNING", "Unknown"]
+
+
+class HashedNaiveBayesClassifier:
+    """
+    Incremental Naive Bayes over hashed term counts.
+
+    The model stays resident between calls and is updated with MultinomialNB.partial_fit, so repeated
+    classification only costs hashing the new lines; HashingVectorizer is stateless and never refitted.
+    Subclasses set category_matcher (a KeywordMatcher), which provides the training labels, and name
+    their labeling rules in labeling; the name is saved in the bundle and a model trained with other
+    rules is rejected on load.
+    """
+    categories = CATEGORIES
+    category_matcher = None
+    labeling = None
+    default_model_file = 'log_classifier.pkl'
+
+    def __init__(self, model_file=None, n_features=2 ** 18, autosave=True):
+        self.model_file = model_file or self.default_model_file
+        self.autosave = autosave
+        self.hasher = HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None)
+        self.model = None
+        self._read_only = False
+
+
+    def determine_category(self, log):
+        return self.category_matcher.match(log)
+
+
+    def categorize(self, logs):
+        """Returns the training category of every log line in one batch."""
+        return self.category_matcher.categorize(logs)
+
+
+    def load_model(self, mmap_mode='r'):
+        """
+        Loads the classifier bundle.
+
+        Args:
+        - mmap_mode (str): joblib memory-mapping mode. Default is 'r' (read-only arrays shared between
+          scoring processes); the model is reloaded into memory before it is trained again.
+
+        Raises:
+        - ValueError: If the bundle was trained with other labeling rules.
+        """
+        bundle = load_bundle(self.model_file, mmap_mode)
+        labeling = bundle["metadata"].get("labeling")
+        if labeling is not None and labeling != self.labeling:
+            raise ValueError(f"Classifier {self.model_file} was trained with {labeling!r} labels, "
+                             f"{type(self).__name__} uses {self.labeling!r} labels.")
+        self.model = bundle["estimator"]
+        if isinstance(bundle["vectorizer"], HashingVectorizer):
+            self.hasher = bundle["vectorizer"]
+        self._read_only = mmap_mode is not None
+
+
+    def save_model(self):
+        save_bundle(self.model_file, self.model, vectorizer=self.hasher, model=type(self).__name__,
+                    classes=list(self.categories), labeling=self.labeling)
+
+
+    def _ensure_model(self):
+        if self.model is None or self._read_only:
+            # partial_fit updates the model in place, so it is loaded into memory instead of memory-mapped
+            try:
+                self.load_model(mmap_mode=None)
+            except FileNotFoundError:
+                pass
+        # Models saved in another format or with other categories can not be updated incrementally
+        if not isinstance(self.model, MultinomialNB) or set(getattr(self.model, 'classes_', [])) != set(self.categories):
+            self.model = MultinomialNB()
+
+
+    def train_classifier(self, logs, categories):
+        """
+        Updates the classifier with labelled log lines.
+
+        Args:
+        - logs (list): List of log lines.
+        - categories (list): Category of every line.
+
+        Returns:
+        - csr_matrix: Hashed features of the lines, reusable for prediction.
+        """
+        self._ensure_model()
+        X = self.hasher.transform(logs)
+        self.model.partial_fit(X, categories, classes=self.categories)
+        if self.autosave:
+            self.save_model()
+        return X
+
+
+    def _predict(self, X):
+        # One predict_proba pass gives both the labels and their probabilities
+        probabilities = self.model.predict_proba(X)
+        best = probabilities.argmax(axis=1)
+        return self.model.classes_[best], probabilities[np.arange(len(best)), best]
+
+
+    def classify(self, logs, clusters):
+        """
+        Trains the classifier on the cluster lines and determines the category of every cluster.
+
+        Args:
+        - logs (list): List of log lines.
+        - clusters (dict): A dictionary containing log clusters.
+
+        Returns:
+        - dict: Dictionary with log categories and their probabilities for each cluster.
+        """
+        training_logs = []
+        bounds = {}
+        for cluster_id, log_group in clusters.items():
+            start = len(training_logs)
+            training_logs.extend(log_group)
+            bounds[cluster_id] = (start, len(training_logs))
+        training_categories = self.categorize(training_logs)
+
+        X = self.train_classifier(training_logs, training_categories)
+        predictions, probabilities = self._predict(X)
+
+        cluster_categories = {}
+        for cluster_id, (start, end) in bounds.items():
+            if cluster_id == -1:
+                continue
+
+            cluster_counter = Counter(predictions[start:end])
+            if len(cluster_counter) > 1:
+                most_common_category = cluster_counter.most_common(1)[0][0]
+                probability = probabilities[start:end].mean()
+            else:
+                most_common_log = Counter(training_logs[start:end]).most_common(1)[0][0]
+                most_common_category = self.determine_category(most_common_log)
+                probability = 1.0
+
+            cluster_categories[cluster_id] = (most_common_category, probability)
+
+        return cluster_categories
+
+
+    def classify_many(self, logs):
+        """
+        Classifies a batch of log lines with the resident model.
+
+        Args:
+        - logs (list): List of log lines.
+
+        Returns:
+        - list: Pairs of (category, probability) for every line.
+        """
+        if self.model is None:
+            self.load_model()
+        predictions, probabilities = self._predict(self.hasher.transform(logs))
+        return list(zip(predictions.tolist(), probabilities.tolist()))
+
+
+    def classify_single_log(self, log):
+        """
+        Classifies a single log; use classify_many for batches.
+
+        Args:
+        - log (str): Log string.
+
+        Returns:
+        - str: Log category.
+        - float: Probability of the predicted category.
+        """
+        return self.classify_many([log])[0]
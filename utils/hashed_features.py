@@ -0,0 +1,72 @@
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+
+class StreamingTfidf:
+    """
+    Out-of-core TF-IDF: stateless hashed term counts weighted by an online IDF estimate.
+
+    Unlike TfidfVectorizer no vocabulary is built, so memory does not depend on the size of the log;
+    only the document frequency of every hash bucket (n_features counters) is kept.
+    """
+    def __init__(self, n_features=2 ** 18, ngram_range=(1, 1), token_pattern=r"(?u)\b\w\w+\b"):
+        self.hasher = HashingVectorizer(n_features=n_features, ngram_range=ngram_range, token_pattern=token_pattern,
+                                        alternate_sign=False, norm=None)
+        self.document_frequency = np.zeros(n_features, dtype=np.float64)
+        self.n_documents = 0.0
+
+
+    def partial_fit(self, documents, sample_weight=None):
+        """
+        Updates the document frequencies with a chunk of documents.
+
+        Args:
+        - documents (list): Documents of the chunk.
+        - sample_weight (ndarray): Occurrence count of every document. Default is None (1 each).
+
+        Returns:
+        - StreamingTfidf: self.
+        """
+        self._partial_fit_counts(self.hasher.transform(documents), sample_weight)
+        return self
+
+
+    def _partial_fit_counts(self, counts, sample_weight=None):
+        weights = np.ones(counts.shape[0]) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+        present = counts.copy()
+        present.data[:] = 1.0
+        self.document_frequency += present.T @ weights
+        self.n_documents += weights.sum()
+
+
+    @property
+    def idf(self):
+        """Smoothed IDF of every hash bucket, as in TfidfVectorizer(smooth_idf=True)."""
+        return np.log((1.0 + self.n_documents) / (1.0 + self.document_frequency)) + 1.0
+
+
+    def transform(self, documents):
+        """
+        Converts documents to L2-normalized TF-IDF vectors using the current IDF estimate.
+
+        Args:
+        - documents (list): Documents.
+
+        Returns:
+        - csr_matrix: Matrix of shape (len(documents), n_features).
+        """
+        return self._weight(self.hasher.transform(documents))
+
+
+    def partial_fit_transform(self, documents, sample_weight=None):
+        """Updates the IDF estimate with a chunk and returns its TF-IDF vectors, hashing the chunk once."""
+        counts = self.hasher.transform(documents)
+        self._partial_fit_counts(counts, sample_weight)
+        return self._weight(counts)
+
+
+    def _weight(self, counts):
+        X = counts.tocsr()
+        X.data *= self.idf[X.indices]
+        return normalize(X, copy=False)
@@ -0,0 +1,113 @@
+import re
+from functools import lru_cache
+
+
+class KeywordMatcher:
+    """
+    Categorizes log lines by keywords with compiled patterns built once per keyword dictionary.
+
+    Categories are checked in priority order (the order of the dictionary); the first category with a
+    keyword anywhere in the line wins. One alternation of all keywords rejects lines without any keyword
+    in a single scan, and every category is a single alternation instead of one scan per keyword.
+    Regex keywords that can not be joined into an alternation (duplicated group names, global inline
+    flags such as a leading (?i)) are matched one by one instead.
+    """
+    def __init__(self, keyword_dict, ignore_case=False, regex=False, default=None):
+        """
+        Args:
+        - keyword_dict (dict or list): Category -> list of keywords, or (category, keywords) pairs in priority order.
+        - ignore_case (bool): Case-insensitive matching. Default is False.
+        - regex (bool): Keywords are regular expressions rather than literal substrings. Default is False.
+        - default: Category of lines without any keyword. Default is None.
+
+        Raises:
+        - re.error: If a regex keyword is not a valid regular expression.
+        """
+        items = keyword_dict.items() if isinstance(keyword_dict, dict) else keyword_dict
+        flags = re.IGNORECASE if ignore_case else 0
+        self.default = default
+        self.patterns = []
+        for category, keywords in items:
+            alternatives = []
+            for keyword in keywords:
+                alternative = keyword if regex else re.escape(keyword)
+                try:
+                    alternatives.append(re.compile(alternative, flags))
+                except re.error as error:
+                    raise re.error(f"Invalid keyword {keyword!r} of category {category!r}: {error}") from error
+            if alternatives:
+                self.patterns.append((category, _join_patterns(alternatives, flags)))
+        any_patterns = _join_patterns([pattern for _, patterns in self.patterns for pattern in patterns], flags)
+        # Without a single alternation the pre-check would cost as much as the category scans
+        self.any_pattern = any_patterns[0] if len(any_patterns) == 1 else None
+
+
+    def match(self, line):
+        """
+        Returns the category of a single line.
+
+        Args:
+        - line (str): Log line.
+
+        Returns:
+        - Category of the highest-priority matching keyword, or the default.
+        """
+        if self.any_pattern is not None and not self.any_pattern.search(line):
+            return self.default
+        for category, patterns in self.patterns:
+            if any(pattern.search(line) for pattern in patterns):
+                return category
+        return self.default
+
+
+    def categorize(self, lines):
+        """
+        Returns the categories of a batch of lines; repeated lines are matched once.
+
+        Args:
+        - lines (iterable): Log lines.
+
+        Returns:
+        - list: Category of every line.
+        """
+        cache = {}
+        categories = []
+        for line in lines:
+            category = cache.get(line, cache)
+            if category is cache:
+                category = cache[line] = self.match(line)
+            categories.append(category)
+        return categories
+
+
+def _join_patterns(patterns, flags):
+    """Joins compiled patterns into one alternation, or keeps them separate if they can not be joined."""
+    if len(patterns) <= 1:
+        return patterns
+    try:
+        return [re.compile('|'.join(f'(?:{pattern.pattern})' for pattern in patterns), flags)]
+    except re.error:
+        return patterns
+
+
+@lru_cache(maxsize=32)
+def _cached_matcher(items, ignore_case, regex, default):
+    return KeywordMatcher(items, ignore_case, regex, default)
+
+
+def get_keyword_matcher(keyword_dict, ignore_case=False, regex=False, default=None):
+    """
+    Returns a KeywordMatcher for a keyword dictionary, reusing the compiled matcher for equal dictionaries.
+
+    Args:
+    - keyword_dict (dict or list): Category -> list of keywords, or (category, keywords) pairs in priority order.
+    - ignore_case (bool): Case-insensitive matching. Default is False.
+    - regex (bool): Keywords are regular expressions rather than literal substrings. Default is False.
+    - default: Category of lines without any keyword. Default is None.
+
+    Returns:
+    - KeywordMatcher: Compiled matcher.
+    """
+    items = keyword_dict.items() if isinstance(keyword_dict, dict) else keyword_dict
+    return _cached_matcher(tuple((category, tuple(keywords)) for category, keywords in items), ignore_case, regex,
+                           default)
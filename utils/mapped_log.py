@@ -0,0 +1,188 @@
+import mmap
+import os
+from collections.abc import Sequence
+import numpy as np
+from utils.parser_log import is_compressed
+
+
+INDEX_SUFFIX = ".idx.npy"
+SCAN_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+class MappedLog(Sequence):
+    """
+    Memory-mapped log file with O(1) random access to line N.
+
+    On the first open the line-offset index (numpy uint64 array of line start offsets followed by
+    the file size) is built in a single pass and saved next to the file as <log_file>.idx.npy,
+    so later opens only map the file and the index.
+    """
+    def __init__(self, log_file, index_file=None, encoding='utf-8', errors='replace'):
+        self.log_file = log_file
+        self.index_file = index_file or log_file + INDEX_SUFFIX
+        self.encoding = encoding
+        self.errors = errors
+        if is_compressed(log_file):
+            raise ValueError(f"Compressed log {log_file} can not be memory-mapped, use LogReader instead.")
+        self._file = open(log_file, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.offsets = self._load_index(size)
+        if self.offsets is None:
+            self.offsets = self._build_index(size)
+            self._save_index()
+
+
+    def _load_index(self, size):
+        """Loads the persisted index if it is still valid for the log file."""
+        try:
+            if os.path.getmtime(self.index_file) < os.path.getmtime(self.log_file):
+                return None
+            offsets = np.load(self.index_file, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        if offsets.dtype != np.uint64 or len(offsets) == 0 or offsets[-1] != size:
+            return None
+        return offsets
+
+
+    def _build_index(self, size):
+        """Scans the mapped file once for newlines and returns the line-offset index."""
+        data = np.frombuffer(self._mmap, dtype=np.uint8) if size else np.empty(0, dtype=np.uint8)
+        starts = [np.zeros(1, dtype=np.uint64)]
+        for chunk_start in range(0, size, SCAN_CHUNK_SIZE):
+            chunk = data[chunk_start:chunk_start + SCAN_CHUNK_SIZE]
+            starts.append(np.flatnonzero(chunk == ord("\n")).astype(np.uint64) + np.uint64(chunk_start + 1))
+        offsets = np.concatenate(starts)
+        if offsets[-1] != size:
+            offsets = np.append(offsets, np.uint64(size))
+        return offsets
+
+
+    def _save_index(self):
+        """Persists the index next to the log file; a read-only location just skips persistence."""
+        tmp_file = self.index_file + ".tmp"
+        try:
+            with open(tmp_file, 'wb') as file:
+                np.save(file, self.offsets)
+            os.replace(tmp_file, self.index_file)
+        except OSError:
+            pass
+
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._decode(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("line index out of range")
+        return self._decode(index)
+
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._decode(i)
+
+
+    def _decode(self, index):
+        raw_line = self._mmap[int(self.offsets[index]):int(self.offsets[index + 1])]
+        if raw_line.endswith(b"\r\n"):
+            raw_line = raw_line[:-2] + b"\n"
+        return raw_line.decode(self.encoding, self.errors)
+
+
+    def line_bytes(self, index):
+        """Returns a zero-copy memoryview over the bytes of line `index`."""
+        return self.slice_bytes(index, index + 1)
+
+
+    def slice_bytes(self, start, stop):
+        """Returns a zero-copy memoryview over the bytes of lines [start, stop)."""
+        return memoryview(self._mmap)[int(self.offsets[start]):int(self.offsets[stop])]
+
+
+    def batches(self, batch_size=10000):
+        """Yields decoded lines in batches, like LogReader."""
+        for start in range(0, len(self), batch_size):
+            yield self[start:start + batch_size]
+
+
+    def take(self, indices):
+        """Returns a lazy view over the lines at `indices`."""
+        return MappedLines(self, indices)
+
+
+    def close(self):
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        self._file.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class MappedLines(Sequence):
+    """Lazy sequence of lines of a MappedLog, decoded on demand from their line indices."""
+    def __init__(self, source, indices):
+        self.source = source
+        self.indices = np.asarray(indices, dtype=np.int64)
+
+
+    def __len__(self):
+        return len(self.indices)
+
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return MappedLines(self.source, self.indices[index])
+        return self.source[int(self.indices[index])]
+
+
+    def __iter__(self):
+        for index in self.indices:
+            yield self.source[int(index)]
+
+
+def take_lines(logs, indices):
+    """
+    Selects log lines by index.
+
+    Args:
+    - logs (list or MappedLog): Log lines.
+    - indices (iterable): Line indices.
+
+    Returns:
+    - list or MappedLines: Lazy view for a MappedLog, a list of lines otherwise.
+    """
+    if isinstance(logs, MappedLog):
+        return logs.take(indices)
+    return [logs[i] for i in indices]
+
+
+def group_labels(labels):
+    """
+    Groups line indices by cluster label.
+
+    Args:
+    - labels (array-like): Cluster label of every line.
+
+    Returns:
+    - dict: Keys are cluster labels in order of first appearance, values are arrays of line indices.
+    """
+    labels = np.asarray(labels)
+    if len(labels) == 0:
+        return {}
+    uniques, first_index, inverse, counts = np.unique(labels, return_index=True, return_inverse=True,
+                                                      return_counts=True)
+    groups = np.split(np.argsort(inverse, kind='stable'), np.cumsum(counts)[:-1])
+    return {uniques[i]: groups[i] for i in np.argsort(first_index)}
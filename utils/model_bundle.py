@@ -0,0 +1,89 @@
+import os
+import tempfile
+from datetime import datetime, timezone
+import joblib
+import sklearn
+
+
+BUNDLE_FORMAT = "log-parser-model"
+BUNDLE_VERSION = 1
+
+
+def save_bundle(model_file, estimator, vectorizer=None, mask_rules=None, **metadata):
+    """
+    Saves a self-contained model bundle: the estimator together with everything needed to score new logs.
+
+    The bundle is stored uncompressed so that load_bundle can memory-map its numpy arrays
+    (cluster centers, IDF weights, ...) and several scoring processes share one copy of them.
+    It is written to a temporary file and renamed over model_file, so processes that have the
+    previous bundle memory-mapped keep reading the old file instead of a truncated one.
+
+    Args:
+    - model_file (str): Path to the bundle file.
+    - estimator (object): Fitted estimator (clustering model or classification pipeline).
+    - vectorizer (object): Fitted vectorizer that produces the estimator's features. Default is None.
+    - mask_rules (list): Masking rules applied to log lines before vectorization. Default is None.
+    - **metadata: Additional metadata (model parameters, dataset size, ...).
+
+    Returns:
+    - dict: The saved bundle.
+    """
+    bundle = {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_VERSION,
+        "estimator": estimator,
+        "vectorizer": vectorizer,
+        "mask_rules": mask_rules,
+        "metadata": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "sklearn_version": sklearn.__version__,
+            **metadata,
+        },
+    }
+    fd, tmp_file = tempfile.mkstemp(prefix=".tmp", dir=os.path.dirname(os.path.abspath(model_file)))
+    os.close(fd)
+    try:
+        joblib.dump(bundle, tmp_file)
+        os.replace(tmp_file, model_file)
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+    return bundle
+
+
+def load_bundle(model_file, mmap_mode='r'):
+    """
+    Loads a model bundle saved by save_bundle.
+
+    Files written before bundles existed (a bare estimator) are wrapped into a version 0 bundle.
+
+    Args:
+    - model_file (str): Path to the bundle file.
+    - mmap_mode (str): joblib memory-mapping mode for numpy arrays; None loads them into memory. Default is 'r'.
+
+    Returns:
+    - dict: Bundle with keys "version", "estimator", "vectorizer", "mask_rules" and "metadata".
+    """
+    bundle = joblib.load(model_file, mmap_mode=mmap_mode)
+    if not isinstance(bundle, dict) or bundle.get("format") != BUNDLE_FORMAT:
+        return {"format": BUNDLE_FORMAT, "version": 0, "estimator": bundle, "vectorizer": None, "mask_rules": None,
+                "metadata": {}}
+    if bundle["version"] > BUNDLE_VERSION:
+        raise ValueError(f"Model bundle {model_file} has version {bundle['version']}, "
+                         f"only versions up to {BUNDLE_VERSION} are supported.")
+    return bundle
+
+
+def require_vectorizer(bundle, model_file):
+    """
+    Checks that a bundle can score new logs, i.e. that it carries the fitted vectorizer of its estimator.
+
+    Args:
+    - bundle (dict): Bundle returned by load_bundle.
+    - model_file (str): Path the bundle was loaded from, used in the error message.
+
+    Raises:
+    - ValueError: If the bundle has no vectorizer (a legacy bare estimator); the model has to be refitted.
+    """
+    if bundle["vectorizer"] is None:
+        raise ValueError(f"Model {model_file} is a legacy model without a fitted vectorizer, refit required.")
@@ -0,0 +1,327 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections.abc import Sequence
+import numpy as np
+from utils.mapped_log import MappedLog
+from utils.parser_log import normalize_batch, parse_log
+from utils.proccess_log_file import preprocess_logs
+
+
+CACHE_DIR = ".log_cache"
+CACHE_VERSION = 2
+MAX_ENTRIES = 8
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class StringColumn(Sequence):
+    """
+    Column of strings stored as one UTF-8 blob plus uint64 offsets.
+
+    Loaded columns are memory-mapped, so only the accessed strings are read and decoded.
+    """
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+
+    @classmethod
+    def from_strings(cls, strings):
+        encoded = [string.encode('utf-8') for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+
+    @classmethod
+    def load(cls, path):
+        return cls(np.load(path + ".data.npy", mmap_mode='r'), np.load(path + ".offsets.npy", mmap_mode='r'))
+
+
+    def save(self, path):
+        np.save(path + ".data.npy", self.data)
+        np.save(path + ".offsets.npy", self.offsets)
+
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("column index out of range")
+        return self.data[int(self.offsets[index]):int(self.offsets[index + 1])].tobytes().decode('utf-8')
+
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def content_hash(log_file):
+    """Returns the blake2b hex digest of the contents of a file."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(log_file, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_fingerprint(log_file, known=None):
+    """
+    Computes the identity of a log file's contents.
+
+    The contents are only hashed when the size or mtime differ from the known fingerprint,
+    so checking an unchanged file costs one stat call.
+
+    Args:
+    - log_file (str): Path to the log file.
+    - known (dict): Previously computed fingerprint of the same file. Default is None.
+
+    Returns:
+    - dict: Keys "size", "mtime_ns" and "content_hash".
+    """
+    stat = os.stat(log_file)
+    if known and known.get("size") == stat.st_size and known.get("mtime_ns") == stat.st_mtime_ns:
+        digest = known["content_hash"]
+    else:
+        digest = content_hash(log_file)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "content_hash": digest}
+
+
+def same_contents(fingerprint, other):
+    return (fingerprint["size"], fingerprint["content_hash"]) == (other["size"], other["content_hash"])
+
+
+class ParseCache:
+    """
+    On-disk columnar cache of parsed, normalized and tokenized log lines.
+
+    Every log path has one entry directory, so a changed file replaces its previous entry. Entries
+    are evicted least recently used first once there are more than max_entries of them.
+    """
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+
+    def entry_dir(self, log_file):
+        key = f"{CACHE_VERSION}|{os.path.abspath(log_file)}"
+        return os.path.join(self.cache_dir, hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest())
+
+
+    @staticmethod
+    def _read_meta(entry_dir):
+        try:
+            with open(os.path.join(entry_dir, "meta.json"), 'r') as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return meta if isinstance(meta, dict) and "file" in meta and "columns" in meta else None
+
+
+    @staticmethod
+    def _write_meta(entry_dir, meta):
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp", dir=entry_dir)
+        with os.fdopen(fd, 'w') as file:
+            json.dump(meta, file)
+        os.replace(tmp_path, os.path.join(entry_dir, "meta.json"))
+
+
+    def fingerprint(self, log_file):
+        """Returns the fingerprint of a log file, reusing the cached content hash when size and mtime match."""
+        meta = self._read_meta(self.entry_dir(log_file))
+        return file_fingerprint(log_file, meta and meta.get("file"))
+
+
+    def load(self, log_file, fingerprint=None):
+        """
+        Loads the cached columns of a log file.
+
+        Args:
+        - log_file (str): Path to the log file.
+        - fingerprint (dict): Current fingerprint of the file. Default is None (computed).
+
+        Returns:
+        - dict: Column name -> memory-mapped StringColumn, or None if the file is not cached.
+        """
+        entry_dir = self.entry_dir(log_file)
+        meta = self._read_meta(entry_dir)
+        if meta is None:
+            return None
+        fingerprint = fingerprint or file_fingerprint(log_file, meta.get("file"))
+        if not same_contents(fingerprint, meta["file"]):
+            return None
+        # The cache may be read-only: bookkeeping writes are best effort, like MappedLog._save_index
+        try:
+            if fingerprint != meta["file"]:
+                # Touched but unchanged: remember the new mtime so the next check skips hashing
+                meta["file"] = fingerprint
+                self._write_meta(entry_dir, meta)
+            else:
+                # The mtime of meta.json is the last-use time of the entry
+                os.utime(os.path.join(entry_dir, "meta.json"))
+        except OSError:
+            pass
+        try:
+            return self._load_columns(entry_dir, meta)
+        except OSError:
+            return None
+
+
+    @staticmethod
+    def _load_columns(entry_dir, meta):
+        return {name: StringColumn.load(os.path.join(entry_dir, name)) for name in meta["columns"]}
+
+
+    def store(self, log_file, columns, fingerprint=None):
+        """
+        Stores columns of a log file in the cache.
+
+        Columns are added to the file's entry when it describes the same contents; otherwise the entry is
+        replaced.
+
+        Args:
+        - log_file (str): Path to the log file.
+        - columns (dict): Column name -> list of strings.
+        - fingerprint (dict): Fingerprint of the file the columns were computed from. Default is None (computed).
+
+        Returns:
+        - dict: Column name -> memory-mapped StringColumn read back from the cache (all columns of the entry).
+
+        Raises:
+        - OSError: If the entry could not be written or read back.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry_dir = self.entry_dir(log_file)
+        fingerprint = fingerprint or self.fingerprint(log_file)
+        meta = self._read_meta(entry_dir)
+        if meta is not None and same_contents(fingerprint, meta["file"]):
+            self._add_columns(entry_dir, meta, columns)
+        else:
+            meta = self._replace_entry(entry_dir, log_file, fingerprint, columns)
+            self._evict()
+        return self._load_columns(entry_dir, meta)
+
+
+    def _add_columns(self, entry_dir, meta, columns):
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp", dir=entry_dir)
+        try:
+            for name, strings in columns.items():
+                StringColumn.from_strings(strings).save(os.path.join(tmp_dir, name))
+                for suffix in (".data.npy", ".offsets.npy"):
+                    os.replace(os.path.join(tmp_dir, name + suffix), os.path.join(entry_dir, name + suffix))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        meta["columns"] = list(dict.fromkeys(meta["columns"] + list(columns)))
+        self._write_meta(entry_dir, meta)
+
+
+    def _replace_entry(self, entry_dir, log_file, fingerprint, columns):
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp", dir=self.cache_dir)
+        for name, strings in columns.items():
+            StringColumn.from_strings(strings).save(os.path.join(tmp_dir, name))
+        meta = {"log_file": os.path.abspath(log_file), "file": fingerprint, "columns": list(columns)}
+        with open(os.path.join(tmp_dir, "meta.json"), 'w') as file:
+            json.dump(meta, file)
+        # The previous entry of the same path is moved aside first: os.replace can not overwrite a non-empty directory
+        old_dir = tmp_dir + ".old"
+        try:
+            os.replace(entry_dir, old_dir)
+        except FileNotFoundError:
+            pass
+        try:
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            # Another process has stored an entry for the same path first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        finally:
+            shutil.rmtree(old_dir, ignore_errors=True)
+        return meta
+
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.startswith("."):
+                # Entries being written by this or another process
+                continue
+            meta_file = os.path.join(self.cache_dir, name, "meta.json")
+            try:
+                entries.append((os.path.getmtime(meta_file), name))
+            except OSError:
+                continue
+        for _, name in sorted(entries)[:max(len(entries) - self.max_entries, 0)]:
+            shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+
+
+def cached_parse(log_file, cache_dir=CACHE_DIR, tokenizer="nltk", stopword_source="nltk", tokens=True):
+    """
+    Parses, normalizes and tokenizes a log file, reusing the parse cache when the file is unchanged.
+
+    Tokens are cached per (tokenizer, stopword source), so changing either never serves stale tokens.
+
+    Args:
+    - log_file (str): Path to the log file.
+    - cache_dir (str): Cache directory. Default is ".log_cache".
+    - tokenizer (str): preprocess_logs tokenizer of the "tokens" column. Default is "nltk".
+    - stopword_source (str): preprocess_logs stopword source of the "tokens" column. Default is "nltk".
+    - tokens (bool): Whether to return the "tokens" column. Default is True.
+
+    Returns:
+    - dict: Columns "raw" (parse_log lines), "normalized" (normalize_log lines) and, if requested,
+      "tokens" (preprocess_logs lines).
+    """
+    cache = ParseCache(cache_dir)
+    fingerprint = cache.fingerprint(log_file)
+    columns = cache.load(log_file, fingerprint) or {}
+    tokens_column = f"tokens.{tokenizer}.{stopword_source}"
+
+    new_columns = {}
+    if "raw" not in columns or "normalized" not in columns:
+        logs = parse_log(log_file)
+        columns = {}
+        new_columns.update(raw=logs, normalized=normalize_batch(logs))
+    if tokens and tokens_column not in columns:
+        logs = new_columns["raw"] if "raw" in new_columns else columns["raw"]
+        new_columns[tokens_column] = preprocess_logs(logs, tokenizer, stopword_source)
+    if new_columns:
+        try:
+            columns = cache.store(log_file, new_columns, fingerprint)
+        except OSError:
+            # The cache is only an optimization: serve the freshly computed columns
+            columns = {**columns, **new_columns}
+
+    result = {"raw": columns["raw"], "normalized": columns["normalized"]}
+    if tokens:
+        result["tokens"] = columns[tokens_column]
+    return result
+
+
+def load_preprocessed_logs(log_file, cache_dir=None, tokenizer="nltk", stopword_source="nltk"):
+    """
+    Loads log lines together with their preprocess_logs tokens.
+
+    Args:
+    - log_file (str or MappedLog): Path to the log file or an already memory-mapped log.
+    - cache_dir (str): Parse cache directory; None disables the cache. Default is None.
+    - tokenizer (str): preprocess_logs tokenizer. Default is "nltk".
+    - stopword_source (str): preprocess_logs stopword source. Default is "nltk".
+
+    Returns:
+    - tuple: Log lines and preprocessed log lines.
+    """
+    if isinstance(log_file, MappedLog):
+        return log_file, preprocess_logs(log_file, tokenizer, stopword_source)
+    if cache_dir is None:
+        logs = parse_log(log_file)
+        return logs, preprocess_logs(logs, tokenizer, stopword_source)
+    columns = cached_parse(log_file, cache_dir, tokenizer, stopword_source)
+    return columns["raw"], columns["tokens"]
@@ -1,20 +1,335 @@
+import bz2
+import calendar
+import gzip
+import io
+import json
+import lzma
+import os
 import re
+import time
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import repeat
+from utils.stopwords import StopwordFilter
 
 
-def parse_log(log_file):
+# Сигнатуры сжатых файлов (ротированные логи: syslog.2.gz, messages.1.bz2, ...)
+COMPRESSED_SIGNATURES = [
+    (b'\x1f\x8b', gzip.open),
+    (b'BZh', bz2.open),
+    (b'\xfd7zXZ\x00', lzma.open),
+]
+
+
+def open_log(log_file):
     """
-    Функция для парсинга логов из файла.
+    Функция для открытия файла логов на бинарное чтение с прозрачной распаковкой gzip, bz2 и xz.
 
     Args:
     - log_file (str): Путь к файлу с логами.
 
+    Returns:
+    - file object: Бинарный файловый объект над (распакованным) потоком логов.
+    """
+    with open(log_file, 'rb') as file:
+        magic = file.read(6)
+    for signature, opener in COMPRESSED_SIGNATURES:
+        if magic.startswith(signature):
+            return opener(log_file, 'rb')
+    return open(log_file, 'rb')
+
+
+class LogReader:
+    """
+    Потоковый читатель логов, выдающий пакеты строк фиксированного размера с ограниченным расходом памяти.
+
+    После каждого пакета `offset` содержит байтовое смещение (в распакованном потоке) сразу за
+    последней выданной строкой, поэтому чтение можно продолжить через LogReader(log_file, offset=reader.offset).
+    Если задан `end`, читаются только строки, начинающиеся до этого смещения. При complete_only=True
+    последняя строка без перевода строки (ещё дописываемая) не выдаётся.
+
+    Как и open(log_file, 'r'), читатель строго декодирует строки (по умолчанию errors='strict') и
+    переводит окончания "\r\n" и одиночный "\r" в "\n" (universal newlines).
+    """
+    def __init__(self, log_file, batch_size=10000, offset=0, encoding='utf-8', errors='strict', end=None,
+                 complete_only=False):
+        self.log_file = log_file
+        self.batch_size = batch_size
+        self.offset = offset
+        self.end = end
+        self.complete_only = complete_only
+        self.encoding = encoding
+        self.errors = errors
+
+
+    def __iter__(self):
+        with open_log(self.log_file) as file:
+            if self.offset:
+                file.seek(self.offset)
+            raw_batch = []
+            position = self.offset
+            for raw_line in file:
+                if self.end is not None and position >= self.end:
+                    break
+                if self.complete_only and not raw_line.endswith(b'\n'):
+                    break
+                position += len(raw_line)
+                raw_batch.append(raw_line)
+                if len(raw_batch) >= self.batch_size:
+                    yield self._decode(raw_batch)
+                    raw_batch = []
+            if raw_batch:
+                yield self._decode(raw_batch)
+
+
+    def _decode(self, raw_batch):
+        self.offset += sum(map(len, raw_batch))
+        text = b''.join(raw_batch).decode(self.encoding, self.errors)
+        # StringIO с newline=None разбивает строки так же, как текстовый режим open()
+        return io.StringIO(text, newline=None).readlines()
+
+
+class LogFollower:
+    """
+    Режим tail/follow для одного или нескольких файлов логов.
+
+    Ротация (смена inode/устройства) и усечение файла (размер меньше сохранённого смещения)
+    обнаруживаются при каждом опросе, после чего файл читается с начала. Контрольная точка
+    (идентификатор файла и байтовое смещение) сохраняется в JSON после обработки каждого
+    пакета, поэтому после перезапуска обрабатываются только новые строки.
+    """
+    def __init__(self, log_files, checkpoint_file=None, batch_size=10000, poll_interval=1.0):
+        self.log_files = [log_files] if isinstance(log_files, str) else list(log_files)
+        self.checkpoint_file = checkpoint_file
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.state = self._load_checkpoint()
+
+
+    def _load_checkpoint(self):
+        if self.checkpoint_file is None or not os.path.exists(self.checkpoint_file):
+            return {}
+        with open(self.checkpoint_file, 'r') as file:
+            return json.load(file)
+
+
+    def save_checkpoint(self):
+        """Атомарно сохраняет контрольную точку (если задан checkpoint_file)."""
+        if self.checkpoint_file is None:
+            return
+        tmp_file = self.checkpoint_file + '.tmp'
+        with open(tmp_file, 'w') as file:
+            json.dump(self.state, file)
+        os.replace(tmp_file, self.checkpoint_file)
+
+
+    def poll(self):
+        """
+        Один проход по всем файлам: выдаёт новые полные строки.
+
+        Смещение пакета фиксируется в контрольной точке, когда потребитель запрашивает следующий
+        пакет, поэтому необработанный пакет после сбоя будет прочитан повторно.
+
+        Returns:
+        - generator: Пары (log_file, lines) с пакетами новых строк.
+        """
+        for log_file in self.log_files:
+            try:
+                stat = os.stat(log_file)
+            except FileNotFoundError:
+                # Во время ротации файла может временно не быть
+                continue
+            state = self.state.get(log_file)
+            if (state is None or [state['device'], state['inode']] != [stat.st_dev, stat.st_ino]
+                    or stat.st_size < state['offset']):
+                state = {'device': stat.st_dev, 'inode': stat.st_ino, 'offset': 0}
+                self.state[log_file] = state
+            if stat.st_size == state['offset']:
+                continue
+            reader = LogReader(log_file, batch_size=self.batch_size, offset=state['offset'], complete_only=True)
+            for batch in reader:
+                yield log_file, batch
+                state['offset'] = reader.offset
+                self.save_checkpoint()
+
+
+    def follow(self):
+        """
+        Бесконечно следит за файлами, опрашивая их раз в poll_interval секунд, пока есть потребитель.
+
+        Returns:
+        - generator: Пары (log_file, lines) с пакетами новых строк.
+        """
+        while True:
+            received = False
+            for log_file, batch in self.poll():
+                received = True
+                yield log_file, batch
+            if not received:
+                time.sleep(self.poll_interval)
+
+
+def iter_log_lines(logs):
+    """
+    Функция для обхода строк логов, переданных списком, итератором строк или итератором пакетов строк.
+
+    Args:
+    - logs (iterable): Список строк, итератор строк или итератор пакетов (например, LogReader).
+
+    Returns:
+    - generator: Строки логов по одной.
+    """
+    for item in logs:
+        if isinstance(item, str):
+            yield item
+        else:
+            yield from item
+
+
+def as_log_list(logs):
+    """
+    Функция для получения списка строк логов из любого поддерживаемого источника.
+
+    Args:
+    - logs (iterable): Список строк, итератор строк или итератор пакетов (например, LogReader).
+
+    Returns:
+    - Sequence: Список строк логов (тот же объект, если уже передана последовательность строк, например MappedLog).
+    """
+    if isinstance(logs, Sequence) and (not len(logs) or isinstance(logs[0], str)):
+        return logs
+    return list(iter_log_lines(logs))
+
+
+def parse_log(log_file, batch_size=10000):
+    """
+    Функция для парсинга логов из файла.
+
+    Args:
+    - log_file (str): Путь к файлу с логами (обычный, .gz, .bz2 или .xz).
+    - batch_size (int): Размер пакета строк при потоковом чтении.
+
     Returns:
     - list: Список строк логов.
     """
-    with open(log_file, 'r') as file:
-        logs = file.readlines()
-    return logs
+    return as_log_list(LogReader(log_file, batch_size=batch_size))
+
+
+# Единое скомпилированное выражение для всех поддерживаемых форматов временных меток:
+# "Jun 14 15:16:01 ..." и "2016-09-28 04:30:30, Info" / "2024-05-21 10:00:00,INFO"
+LOG_PATTERN = re.compile(
+    r'(?:(?P<syslog>\w{3}\s+\d+\s+\d+:\d+:\d+)\s+'
+    r'|(?P<iso>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\s*)'
+    r'(?P<message>.+)'
+)
+
+MONTHS = {month: number for number, month in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], start=1)}
+
+# strptime без года разбирает дату в 1900 году, поэтому 29 февраля в формате syslog недопустимо
+SYSLOG_DAYS_IN_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+
+class LogNormalizer:
+    """
+    Скомпилированный нормализатор временных меток логов.
+
+    Один проход единым регулярным выражением на строку, быстрый разбор меток без strptime,
+    кэш текущего года и кэш уже преобразованных меток syslog.
+    """
+    def __init__(self, cache_size=100000):
+        self.cache_size = cache_size
+        self._syslog_cache = {}
+        self._year = 0
+        self._year_end = 0.0
+
+
+    def current_year(self):
+        """Возвращает текущий год, обращаясь к часам только после смены года."""
+        now = time.time()
+        if now >= self._year_end:
+            self._year = datetime.now().year
+            self._year_end = datetime(self._year + 1, 1, 1).timestamp()
+            self._syslog_cache.clear()
+        return self._year
+
+
+    def normalize(self, log):
+        """
+        Нормализует одну строку лога.
+
+        Args:
+        - log (str): Строка лога.
+
+        Returns:
+        - str: Нормализованная строка лога или исходная строка, если формат не распознан.
+        """
+        match = LOG_PATTERN.match(log)
+        if match is None:
+            return log
+        syslog_timestamp = match.group('syslog')
+        if syslog_timestamp is not None:
+            timestamp_str = self._convert_syslog(syslog_timestamp)
+        else:
+            timestamp_str = self._convert_iso(match.group('iso'))
+        if timestamp_str is None:
+            return log
+        return f"{timestamp_str}, {match.group('message')}"
+
+
+    def normalize_batch(self, logs):
+        """
+        Нормализует пакет строк логов.
+
+        Args:
+        - logs (iterable): Список или массив строк логов.
+
+        Returns:
+        - list: Список нормализованных строк логов.
+        """
+        normalize = self.normalize
+        return [normalize(log) for log in logs]
+
+
+    def _convert_syslog(self, timestamp_str):
+        year = self.current_year()
+        converted = self._syslog_cache.get(timestamp_str)
+        if converted is None:
+            converted = self._parse_syslog(timestamp_str, year)
+            if len(self._syslog_cache) >= self.cache_size:
+                self._syslog_cache.clear()
+            self._syslog_cache[timestamp_str] = converted
+        return converted or None
+
+
+    @staticmethod
+    def _parse_syslog(timestamp_str, year):
+        """Разбирает "Jun 14 15:16:01" по тем же правилам, что и strptime('%b %d %H:%M:%S')."""
+        month_str, day_str, clock = timestamp_str.split()
+        hour_str, minute_str, second_str = clock.split(':')
+        month = MONTHS.get(month_str.lower())
+        if month is None or max(len(day_str), len(hour_str), len(minute_str), len(second_str)) > 2:
+            return ''
+        day, hour, minute, second = int(day_str), int(hour_str), int(minute_str), int(second_str)
+        if not (1 <= day <= SYSLOG_DAYS_IN_MONTH[month - 1] and hour <= 23 and minute <= 59 and second <= 59):
+            return ''
+        return f"{year:04d}-{month:02d}-{day:02d} {hour:02d}:{minute:02d}:{second:02d}"
+
+
+    @staticmethod
+    def _convert_iso(timestamp_str):
+        """Проверяет "2024-05-21 10:00:00" по тем же правилам, что и strptime('%Y-%m-%d %H:%M:%S')."""
+        year, month, day = int(timestamp_str[0:4]), int(timestamp_str[5:7]), int(timestamp_str[8:10])
+        hour, minute, second = int(timestamp_str[11:13]), int(timestamp_str[14:16]), int(timestamp_str[17:19])
+        if not (year >= 1 and 1 <= month <= 12 and hour <= 23 and minute <= 59 and second <= 59):
+            return None
+        if not 1 <= day <= calendar.monthrange(year, month)[1]:
+            return None
+        return f"{year}{timestamp_str[4:]}"
+
+
+NORMALIZER = LogNormalizer()
 
 
 def normalize_log(log):
@@ -27,35 +342,20 @@ def normalize_log(log):
     Returns:
     - str: Нормализованная строка лога.
     """
-    # Пример шаблонов для различных форматов логов
-    patterns = [
-        r'(?P<timestamp>\w{3}\s+\d+\s+\d+:\d+:\d+)\s+(?P<message>.+)',  # формат "Jun 14 15:16:01"
-        r'(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\s*(?P<message>.+)',  # формат "2016-09-28 04:30:30, Info"
-        r'(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\s*(?P<message>.+)',  # формат "2024-05-21 10:00:00,INFO"
-    ]
+    return NORMALIZER.normalize(log)
 
-    for pattern in patterns:
-        match = re.match(pattern, log)
-        if match:
-            timestamp_str = match.group('timestamp')
-            message = match.group('message')
 
-            # Преобразуем временную метку в единый формат
-            try:
-                if re.match(r'\w{3}\s+\d+\s+\d+:\d+:\d+', timestamp_str):
-                    timestamp = datetime.strptime(timestamp_str, '%b %d %H:%M:%S')
-                    timestamp = timestamp.replace(year=datetime.now().year)
-                    timestamp_str = timestamp.strftime('%Y-%m-%d %H:%M:%S')
-                else:
-                    timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
-                    timestamp_str = timestamp.strftime('%Y-%m-%d %H:%M:%S')
-            except ValueError:
-                continue
+def normalize_batch(logs):
+    """
+    Функция для нормализации пакета логов.
 
-            normalized_log = f"{timestamp_str}, {message}"
-            return normalized_log
+    Args:
+    - logs (iterable): Список или массив строк логов.
 
-    return log  # Вернуть оригинальный лог, если не удалось нормализовать
+    Returns:
+    - list: Список нормализованных строк логов.
+    """
+    return NORMALIZER.normalize_batch(logs)
 
 
 def remove_stopwords(logs, stopwords=None):
@@ -63,38 +363,108 @@ def remove_stopwords(logs, stopwords=None):
     Функция для удаления стоп-слов из логов.
 
     Args:
-    - logs (list): Список строк логов.
-    - stopwords (list): Список стоп-слов. Если не указан, будет использован список по умолчанию.
+    - logs (iterable): Список строк логов, итератор строк или итератор пакетов строк (LogReader).
+    - stopwords (list or frozenset): Список стоп-слов (сравнение без учёта регистра). Если не указан,
+      стоп-слова не удаляются; список stopwords/words.txt подключается явно через get_stopwords(bundled=True).
 
     Returns:
     - list: Список строк логов без стоп-слов.
     """
-    if stopwords is None:
-        stopwords = []
+    return StopwordFilter(stopwords or frozenset()).clean_batch(iter_log_lines(logs))
+
+
+
+def normalize_logs(logs):
+    """
+    Нормализует логи пакет за пакетом.
+
+    Args:
+    - logs (iterable): Список строк логов, итератор строк или итератор пакетов строк (LogReader).
+
+    Returns:
+    - generator: Нормализованные строки логов.
+    """
+    for log in iter_log_lines(logs):
+        yield NORMALIZER.normalize(log)
+
+
+def is_compressed(log_file):
+    """
+    Функция для проверки, сжат ли файл логов (gzip, bz2 или xz).
+
+    Args:
+    - log_file (str): Путь к файлу с логами.
+
+    Returns:
+    - bool: True, если файл сжат.
+    """
+    with open(log_file, 'rb') as file:
+        magic = file.read(6)
+    return any(magic.startswith(signature) for signature, _ in COMPRESSED_SIGNATURES)
+
+
+def shard_log_file(log_file, shards):
+    """
+    Функция для разбиения файла логов на байтовые диапазоны, выровненные по границам строк.
+
+    Args:
+    - log_file (str): Путь к файлу с логами.
+    - shards (int): Желаемое количество диапазонов.
+
+    Returns:
+    - list: Список пар (start, end) байтовых смещений; диапазонов может быть меньше, чем shards.
+    """
+    size = os.path.getsize(log_file)
+    bounds = [0]
+    with open(log_file, 'rb') as file:
+        for i in range(1, shards):
+            position = size * i // shards
+            if position <= bounds[-1]:
+                continue
+            # Если байт перед position - перевод строки, readline() остановится ровно на position
+            file.seek(position - 1)
+            file.readline()
+            if bounds[-1] < file.tell() < size:
+                bounds.append(file.tell())
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+
+
+def _normalize_shard(log_file, start, end, stopwords, batch_size):
+    stopword_filter = StopwordFilter(stopwords or frozenset())
     cleaned_logs = []
-    for log in logs:
-        cleaned_words = []
-        for word in log.split():
-            if word.lower() not in stopwords:
-                cleaned_words.append(word)
-        cleaned_log = ' '.join(cleaned_words)
-        cleaned_logs.append(cleaned_log)
+    for batch in LogReader(log_file, batch_size=batch_size, offset=start, end=end):
+        cleaned_logs.extend(stopword_filter.clean_batch(normalize_batch(batch)))
     return cleaned_logs
 
 
-
-def parse_and_normalize_logs(log_file, stopwords=None):
+def parse_and_normalize_logs(log_file, stopwords=None, batch_size=10000, workers=1):
     """
     Функция для парсинга и нормализации логов из файла с опциональным удалением стоп-слов.
 
+    Файл читается потоково пакетами по batch_size строк, поэтому в памяти одновременно
+    находятся только очищенные строки и один пакет исходных. При workers > 1 несжатый файл
+    делится на байтовые диапазоны по границам строк, которые обрабатываются в отдельных
+    процессах; результаты собираются в исходном порядке строк.
+
     Args:
     - log_file (str): Путь к файлу с логами.
-    - stopwords (list): Список стоп-слов для удаления (необязательно).
+    - stopwords (list): Список стоп-слов для удаления (по умолчанию не удаляются).
+    - batch_size (int): Размер пакета строк при потоковом чтении.
+    - workers (int): Количество процессов (None - по числу ядер, 1 - без параллелизма).
 
     Returns:
     - list: Список нормализованных строк логов без стоп-слов.
     """
-    logs = parse_log(log_file)
-    normalized_logs = [normalize_log(log) for log in logs]
-    cleaned_logs = remove_stopwords(normalized_logs, stopwords)
+    workers = workers or os.cpu_count() or 1
+    shards = [] if workers <= 1 or is_compressed(log_file) else shard_log_file(log_file, workers)
+    if len(shards) <= 1:
+        return _normalize_shard(log_file, 0, None, stopwords, batch_size)
+
+    starts, ends = zip(*shards)
+    cleaned_logs = []
+    with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+        results = executor.map(_normalize_shard, repeat(log_file), starts, ends, repeat(stopwords), repeat(batch_size))
+        for shard_logs in results:
+            cleaned_logs.extend(shard_logs)
     return cleaned_logs
@@ -1,37 +1,74 @@
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
+import re
 import string
-nltk.download('stopwords')
-nltk.download('punkt')
+from functools import lru_cache
+from utils.parser_log import iter_log_lines
+from utils.stopwords import english_stopwords
 
+# Все подстроки string.punctuation: токен удалялся проверкой `word in string.punctuation`
+PUNCTUATION_TOKENS = frozenset(string.punctuation[start:end]
+                               for start in range(len(string.punctuation))
+                               for end in range(start + 1, len(string.punctuation) + 1))
 
-def preprocess_logs(logs):
+# Слова, в том числе склеенные внутренней пунктуацией (IP-адреса, host-name, uid=0, 15:16:01)
+TOKEN_PATTERN = re.compile(r"\w+(?:[-./:=@']\w+)*")
+
+
+@lru_cache(maxsize=None)
+def _preprocess_stopwords(source):
+    return english_stopwords(source) | PUNCTUATION_TOKENS
+
+
+def _nltk_tokenize(log):
+    import nltk
+    from nltk.tokenize import word_tokenize
+    try:
+        return word_tokenize(log)
+    except LookupError:
+        if not nltk.download('punkt', quiet=True):
+            raise LookupError("The NLTK punkt model is not installed and could not be downloaded; "
+                              "install it or use the \"regex\" tokenizer.")
+        return word_tokenize(log)
+
+
+def preprocess_logs(logs, tokenizer="nltk", stopword_source="nltk"):
     """
     Функция для предобработки логов: удаление стоп-слов и приведение к нижнему регистру.
 
+    Данные NLTK загружаются при первом использовании, а не при импорте. Без сети работают
+    tokenizer="regex" и stopword_source="sklearn"; их результат отличается от настроек по умолчанию.
+
     Args:
-    - logs (list): Список строк логов.
+    - logs (iterable): Список строк логов, итератор строк или итератор пакетов строк (LogReader).
+    - tokenizer (str): "nltk" - nltk.word_tokenize (по умолчанию), "regex" - быстрый токенизатор
+      на скомпилированном выражении.
+    - stopword_source (str): Список английских стоп-слов: "nltk" (по умолчанию) или "sklearn".
 
     Returns:
     - list: Список предобработанных строк логов.
     """
-    # Получаем список стоп-слов из библиотеки NLTK
-    stop_words = set(stopwords.words("english"))
+    if tokenizer == "regex":
+        tokenize = TOKEN_PATTERN.findall
+    elif tokenizer == "nltk":
+        tokenize = _nltk_tokenize
+    else:
+        raise ValueError(f"Unknown tokenizer: {tokenizer}")
+
+    # Стоп-слова английского языка загружаются один раз и объединены с пунктуацией в одно множество
+    stop_words = _preprocess_stopwords(stopword_source)
 
     # Инициализируем список для хранения предобработанных логов
     preprocessed_logs = []
 
     # Проходимся по каждой строке лога
-    for log in logs:
+    for log in iter_log_lines(logs):
         # Приводим строку к нижнему регистру
         log = log.lower()
 
         # Токенизируем строку на слова
-        words = word_tokenize(log)
+        words = tokenize(log)
 
         # Удаляем стоп-слова и пунктуацию из токенизированной строки
-        filtered_words = [word for word in words if word not in stop_words and word not in string.punctuation]
+        filtered_words = [word for word in words if word not in stop_words]
 
         # Объединяем токены обратно в строку
         preprocessed_log = ' '.join(filtered_words)
@@ -39,4 +76,4 @@ def preprocess_logs(logs):
         # Добавляем предобработанную строку в список
         preprocessed_logs.append(preprocessed_log)
 
-    return preprocessed_logs
\ No newline at end of file
+    return preprocessed_logs
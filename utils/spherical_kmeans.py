@@ -0,0 +1,97 @@
+import numpy as np
+from scipy import sparse
+from sklearn.cluster import kmeans_plusplus
+from sklearn.preprocessing import normalize
+from sklearn.utils import check_random_state
+
+
+def nonzero_rows(X):
+    """Returns a boolean mask of the rows of a sparse matrix with at least one non-zero value."""
+    X = sparse.csr_matrix(X)
+    return np.asarray(abs(X).sum(axis=1)).ravel() > 0
+
+
+class SphericalKMeans:
+    """
+    K-means with cosine similarity on L2-normalized rows (spherical k-means).
+
+    Rows are assigned to the centroid with the highest dot product and centroids are re-normalized
+    weighted means, so only the sparse matrix X (O(nnz)) and the k x d centroids are kept in memory;
+    no n x n similarity matrix is built. inertia_ is the weighted sum of cosine distances (1 - similarity).
+    All-zero rows (lines without known terms) are never used as initial or re-seeded centroids.
+    """
+    def __init__(self, n_clusters=8, n_init=10, max_iter=300, tol=1e-6, random_state=None):
+        self.n_clusters = n_clusters
+        self.n_init = n_init
+        self.max_iter = max_iter
+        self.tol = tol
+        self.random_state = random_state
+
+
+    def fit(self, X, sample_weight=None, init=None):
+        """
+        Clusters the rows of X.
+
+        Args:
+        - X (array or sparse matrix): Feature matrix; rows are L2-normalized before clustering.
+        - sample_weight (ndarray): Weight of every row. Default is None.
+        - init (ndarray): Initial centroids; when given a single run starts from them. Default is None (k-means++).
+
+        Returns:
+        - SphericalKMeans: self.
+        """
+        X = normalize(sparse.csr_matrix(X, dtype=np.float64))
+        weights = np.ones(X.shape[0]) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+        # Zero seeding weight keeps k-means++ away from all-zero rows, which would give degenerate centroids
+        seed_weights = weights * nonzero_rows(X)
+        if np.count_nonzero(seed_weights) < self.n_clusters:
+            seed_weights = weights
+        random_state = check_random_state(self.random_state)
+        best = None
+        for _ in range(1 if init is not None else self.n_init):
+            centers = normalize(np.asarray(init, dtype=np.float64)) if init is not None else \
+                normalize(kmeans_plusplus(X, self.n_clusters, sample_weight=seed_weights, random_state=random_state)[0])
+            result = self._run(X, weights, centers)
+            if best is None or result[2] < best[2]:
+                best = result
+        self.cluster_centers_, self.labels_, self.inertia_, self.n_iter_ = best
+        return self
+
+
+    def _run(self, X, weights, centers):
+        n_iter = 0
+        for n_iter in range(1, self.max_iter + 1):
+            labels, similarities = self._assign(X, centers)
+            new_centers = self._update(X, weights, labels, similarities, len(centers))
+            shift = np.abs(new_centers - centers).sum()
+            centers = new_centers
+            if shift <= self.tol:
+                break
+        labels, similarities = self._assign(X, centers)
+        inertia = float(np.dot(weights, 1.0 - similarities))
+        return centers, labels, inertia, n_iter
+
+
+    @staticmethod
+    def _assign(X, centers):
+        scores = np.asarray(X @ centers.T)
+        labels = scores.argmax(axis=1)
+        return labels, scores[np.arange(len(labels)), labels]
+
+
+    @staticmethod
+    def _update(X, weights, labels, similarities, n_clusters):
+        assignment = sparse.csr_matrix((weights, (labels, np.arange(len(labels)))), shape=(n_clusters, len(labels)))
+        centers = np.asarray((assignment @ X).todense())
+        empty = np.flatnonzero(np.abs(centers).sum(axis=1) == 0)
+        if len(empty):
+            # Empty clusters are re-seeded with the non-zero rows farthest from their centroids
+            order = np.argsort(similarities)
+            farthest = order[nonzero_rows(X)[order]][:len(empty)]
+            centers[empty[:len(farthest)]] = X[farthest].toarray()
+        return normalize(centers)
+
+
+    def predict(self, X):
+        """Returns the index of the most similar centroid for every row of X."""
+        return self._assign(normalize(sparse.csr_matrix(X, dtype=np.float64)), self.cluster_centers_)[0]
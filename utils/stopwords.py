@@ -0,0 +1,109 @@
+import os
+from functools import lru_cache
+
+
+STOPWORDS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "stopwords", "words.txt")
+
+
+@lru_cache(maxsize=None)
+def load_stopwords(path=STOPWORDS_FILE):
+    """
+    Loads a stopword file (one word per line) once per process.
+
+    Args:
+    - path (str): Path to the stopword file. Defaults to the bundled stopwords/words.txt.
+
+    Returns:
+    - frozenset: Lowercase stopwords.
+    """
+    with open(path, encoding='utf-8') as file:
+        return frozenset(word.strip().lower() for word in file if word.strip())
+
+
+@lru_cache(maxsize=None)
+def english_stopwords(source="nltk"):
+    """
+    Loads an English stopword set on first use (nothing is downloaded at import time).
+
+    Args:
+    - source (str): "nltk" - the NLTK corpus, downloaded on first use when it is not installed;
+      "sklearn" - the scikit-learn list, always available offline. Default is "nltk".
+
+    Returns:
+    - frozenset: Lowercase English stopwords.
+    """
+    if source == "nltk":
+        import nltk
+        from nltk.corpus import stopwords
+        try:
+            return frozenset(stopwords.words("english"))
+        except LookupError:
+            if not nltk.download('stopwords', quiet=True):
+                raise LookupError("The NLTK stopwords corpus is not installed and could not be downloaded; "
+                                  "install it or use the \"sklearn\" stopword source.")
+            return frozenset(stopwords.words("english"))
+    if source == "sklearn":
+        from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+        return frozenset(ENGLISH_STOP_WORDS)
+    raise ValueError(f"Unknown stopword source: {source}")
+
+
+def get_stopwords(words=None, bundled=False):
+    """
+    Builds the stopword set from a user list and, on request, the bundled file.
+
+    The bundled stopwords/words.txt also lists informative log tokens ("error", "failed", "timeout", ...),
+    so it is only used when asked for explicitly.
+
+    Args:
+    - words (iterable): Stopwords. Default is None.
+    - bundled (bool): Whether to include the bundled stopwords/words.txt. Default is False.
+
+    Returns:
+    - frozenset: Lowercase stopwords.
+    """
+    extra = frozenset(word.lower() for word in words) if words else frozenset()
+    return _merge_stopwords(extra, bundled)
+
+
+@lru_cache(maxsize=32)
+def _merge_stopwords(extra, bundled):
+    return load_stopwords() | extra if bundled else extra
+
+
+class StopwordFilter:
+    """Removes stopwords from log lines using a frozenset lookup per token."""
+    def __init__(self, stopwords):
+        self.stopwords = stopwords if isinstance(stopwords, frozenset) else get_stopwords(stopwords, bundled=False)
+
+
+    def clean(self, log):
+        """
+        Removes stopwords from a single log line (comparison is case-insensitive).
+
+        Args:
+        - log (str): Log line.
+
+        Returns:
+        - str: Log line without stopwords, tokens joined by single spaces.
+        """
+        words = log.split()
+        # One lower() per line instead of one per word; whitespace is not affected by lowercasing
+        lowered = log.lower().split()
+        if self.stopwords.isdisjoint(lowered):
+            return ' '.join(words)
+        return ' '.join([word for word, lowered_word in zip(words, lowered) if lowered_word not in self.stopwords])
+
+
+    def clean_batch(self, logs):
+        """
+        Removes stopwords from a batch of log lines.
+
+        Args:
+        - logs (iterable): Log lines.
+
+        Returns:
+        - list: Log lines without stopwords.
+        """
+        clean = self.clean
+        return [clean(log) for log in logs]
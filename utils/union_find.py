@@ -0,0 +1,41 @@
+import numpy as np
+
+
+class UnionFind:
+    """Disjoint-set forest over the integers 0..n-1 with path halving and union by size."""
+    def __init__(self, n):
+        self.parent = np.arange(n)
+        self.size = np.ones(n, dtype=np.int64)
+
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return int(item)
+
+
+    def union(self, first, second):
+        """Joins the sets of two items; returns False if they were already in the same set."""
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return False
+        if self.size[first] < self.size[second]:
+            first, second = second, first
+        self.parent[second] = first
+        self.size[first] += self.size[second]
+        return True
+
+
+    def groups(self):
+        """
+        Returns the sets as lists of items.
+
+        Returns:
+        - list: Sets ordered by their smallest item, items in ascending order.
+        """
+        groups = {}
+        for item in range(len(self.parent)):
+            groups.setdefault(self.find(item), []).append(item)
+        return list(groups.values())